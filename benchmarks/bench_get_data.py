@@ -0,0 +1,101 @@
+"""End-to-end benchmark of GetData.get_data without network access.
+
+Runs GetData against StubTransport for 1-day, 1-year and 7-year ranges and reports the wall time,
+the throughput, the peak memory traced by tracemalloc and the time spent in every stage.
+
+    python benchmarks/bench_get_data.py --latency 0.2 --failure-rate 0.05 --output results.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from electricity_data_fetching_tr import GetData
+from electricity_data_fetching_tr.utils import Profiler, profiling
+from stub import StubTransport
+
+SCENARIOS = {
+    '1d': ('2024-06-17', '2024-06-17'),
+    '1y': ('2023-06-18', '2024-06-17'),
+    '7y': ('2017-06-18', '2024-06-17'),
+}
+
+def run_once(name:str, args, transport:StubTransport, trace_memory:bool=False) -> tuple:
+    """Run a scenario once, return the elapsed time, the peak memory, the rows written and the profiler."""
+    start_date, end_date = SCENARIOS[name]
+    profiler = Profiler()
+    peak_memory = None
+    with tempfile.TemporaryDirectory() as dataset_dir:
+        data = GetData(dataset_dir=dataset_dir, transport=transport, max_workers=args.max_workers, storage=args.storage)
+        if trace_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        with profiling(profiler):
+            data.get_data(start_date, end_date, file_name='bench')
+        elapsed = time.perf_counter() - start
+        if trace_memory:
+            _, peak_memory = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        rows = len(data.storage.read())
+    return elapsed, peak_memory, rows, profiler
+
+def run_scenario(name:str, args) -> dict:
+    transport = StubTransport(
+        recordings_dir=args.recordings, latency=args.latency, failure_rate=args.failure_rate, seed=args.seed,
+        backoff_factor=args.backoff, jitter=0.0
+    )
+    # The first run generates the payloads of the stub and measures the peak memory,
+    # tracemalloc slows everything down so the time is measured in a second run.
+    peak_memory = run_once(name, args, transport, trace_memory=args.memory)[1]
+    transport.reset_stats()
+    elapsed, _, rows, profiler = run_once(name, args, transport)
+    
+    report = profiler.report()
+    return {
+        'scenario': name,
+        'rows': rows,
+        'seconds': round(elapsed, 4),
+        'rows_per_second': round(rows / elapsed, 1),
+        'peak_memory_mb': round(peak_memory / 2**20, 2) if peak_memory is not None else None,
+        'stages': {span: round(stats['total'], 4) for span, stats in sorted(report['spans'].items())},
+        'errors': len(report['errors']),
+        'transport': {endpoint.rsplit('/', 1)[-1]: {key: stats[key] for key in ('requests', 'retries', 'failures')}
+                      for endpoint, stats in transport.get_stats().items()},
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--scenarios', nargs='+', default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument('--repeat', type=int, default=1, help='Number of runs of every scenario.')
+    parser.add_argument('--latency', type=float, default=0.0, help='Injected latency of every request in seconds.')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='Ratio of the requests that fail.')
+    parser.add_argument('--backoff', type=float, default=0.01, help='Backoff factor of the retries in seconds.')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-workers', type=int, default=4)
+    parser.add_argument('--storage', default='csv')
+    parser.add_argument('--recordings', default=None, help="Directory with recorded '<endpoint>.json' items.")
+    parser.add_argument('--no-memory', dest='memory', action='store_false', help='Do not measure the peak memory.')
+    parser.add_argument('--output', default=None, help='Path of the JSON file to write the results to.')
+    args = parser.parse_args()
+    
+    results = list()
+    for name in args.scenarios:
+        for _ in range(args.repeat):
+            result = run_scenario(name, args)
+            results.append(result)
+            memory = f", peak {result['peak_memory_mb']} MB" if result['peak_memory_mb'] is not None else ''
+            print(f"{name}: {result['rows']} rows in {result['seconds']} s ({result['rows_per_second']} rows/s{memory})")
+    
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
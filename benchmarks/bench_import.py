@@ -0,0 +1,76 @@
+"""Startup benchmark of the package.
+
+Every scenario runs in a fresh interpreter and reports the time to import and set up what it needs and the
+heavy dependencies it loaded, e.g. a reader of a local dataset should not load requests or forex_python.
+
+    python benchmarks/bench_import.py --repeat 10 --output results.json
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ['numpy', 'pandas', 'requests', 'pytz', 'dateutil', 'workalendar', 'forex_python', 'pyarrow']
+
+SCENARIOS = {
+    'package': 'import electricity_data_fetching_tr',
+    'reader': 'from electricity_data_fetching_tr.core import DatasetReader',
+    'hot_cache': 'from electricity_data_fetching_tr.core import HotCache',
+    'get_data': 'from electricity_data_fetching_tr import GetData; GetData()',
+    'update_data': 'from electricity_data_fetching_tr import UpdateData',
+}
+
+# Runs in the fresh interpreter, prints the elapsed time and the heavy modules that were loaded.
+PROBE = """
+import sys, time, json
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+print(json.dumps([elapsed, [name for name in {modules!r} if name in sys.modules]]))
+"""
+
+def run_once(name:str) -> tuple:
+    """Run a scenario in a new interpreter, return the elapsed time and the loaded heavy modules."""
+    code = PROBE.format(statement=SCENARIOS[name], modules=HEAVY_MODULES)
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get('PYTHONPATH')])))
+    output = subprocess.run([sys.executable, '-c', code], env=env, cwd=ROOT, capture_output=True, text=True, check=True)
+    elapsed, modules = json.loads(output.stdout.strip().splitlines()[-1])
+    return elapsed, modules
+
+def run_scenario(name:str, repeat:int) -> dict:
+    # The first run fills the bytecode and file system caches and is not measured.
+    _, modules = run_once(name)
+    times = [run_once(name)[0] for _ in range(repeat)]
+    return {
+        'scenario': name,
+        'statement': SCENARIOS[name],
+        'median_ms': round(statistics.median(times) * 1000, 2),
+        'min_ms': round(min(times) * 1000, 2),
+        'modules': modules,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--scenarios', nargs='+', default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument('--repeat', type=int, default=5, help='Number of measured runs of every scenario.')
+    parser.add_argument('--output', default=None, help='Path of the JSON file to write the results to.')
+    args = parser.parse_args()
+
+    results = list()
+    for name in args.scenarios:
+        result = run_scenario(name, args.repeat)
+        results.append(result)
+        print(f"{name}: {result['median_ms']} ms (min {result['min_ms']} ms), loads {', '.join(result['modules']) or 'nothing heavy'}")
+
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+import os
+import json
+import time
+import random
+import requests
+import numpy as np
+import pandas as pd
+from urllib.parse import urlsplit
+
+from electricity_data_fetching_tr.utils.transport import Transport
+
+# Columns of the synthetic payloads of every endpoint, the last part of the URL is the key.
+ENDPOINT_KEYS = {
+    'mcp': ['price', 'priceUsd'],
+    'system-marginal-price': ['systemMarginalPrice'],
+    'load-estimation-plan': ['lep'],
+    'aic': ['toplam', 'dogalgaz', 'ruzgar', 'linyit', 'ithalKomur', 'barajli', 'akarsu'],
+}
+
+class StubResponse:
+    """Minimal stand-in for requests.Response."""
+    def __init__(self, status_code:int, content:bytes=b''):
+        self.status_code = status_code
+        self.headers = {}
+        self.content = content
+    
+    def json(self) -> dict:
+        return json.loads(self.content)
+    
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Error", response=self)
+
+class StubTransport(Transport):
+    """Transport that answers the EPIAS requests locally instead of sending them.
+    Replays recorded items if a recording of the endpoint exists, otherwise generates synthetic items.
+    Latency and failures can be injected to exercise the retries.
+    """
+    def __init__(self, recordings_dir:str=None, latency:float=0.0, failure_rate:float=0.0, seed:int=0, **kwargs):
+        """
+        Initialize the StubTransport class.
+
+        Args:
+            recordings_dir (str, optional): Directory with '<endpoint>.json' files holding a list of items. Defaults to None.
+            latency (float, optional): Time every request takes in seconds. Defaults to 0.0.
+            failure_rate (float, optional): Ratio of the requests that fail with a 503 or a connection error. Defaults to 0.0.
+            seed (int, optional): Seed of the injected failures. Defaults to 0.
+            **kwargs: Passed to Transport, e.g. max_retries or backoff_factor.
+        """
+        super().__init__(**kwargs)
+        self.recordings_dir = recordings_dir
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self._recordings = {}
+        # Payloads are generated once, so the benchmark measures the pipeline and not the stub.
+        self._payloads = {}
+    
+    def _recording(self, endpoint:str) -> list:
+        if self.recordings_dir is None:
+            return None
+        if endpoint not in self._recordings:
+            path = os.path.join(self.recordings_dir, f"{endpoint}.json")
+            self._recordings[endpoint] = json.load(open(path)) if os.path.exists(path) else None
+        return self._recordings[endpoint]
+    
+    def _synthetic_items(self, endpoint:str, start:pd.Timestamp, end:pd.Timestamp) -> list:
+        hours = pd.date_range(start, end, freq='h')
+        dates = [hour.isoformat() for hour in hours]
+        # Daily and weekly seasonality, deterministic for the same hour
+        position = (hours.as_unit('ns').asi8 // 3_600_000_000_000).astype(float)
+        base = 1500 + 500 * np.sin(position * 2 * np.pi / 24) + 200 * np.sin(position * 2 * np.pi / 168)
+        columns = {}
+        for index, key in enumerate(ENDPOINT_KEYS[endpoint]):
+            columns[key] = (base / (index + 1)).round(2).tolist()
+        if endpoint == 'mcp':
+            columns['priceUsd'] = (np.array(columns['price']) / 30).round(2).tolist()
+        return [dict(zip(['date', *columns], values)) for values in zip(dates, *columns.values())]
+    
+    def _perform(self, method:str, url:str, headers:dict, data):
+        if self.latency:
+            time.sleep(self.latency)
+        if self._random.random() < self.failure_rate:
+            if self._random.random() < 0.5:
+                raise requests.ConnectionError('Injected connection error')
+            return StubResponse(503)
+        
+        endpoint = urlsplit(url).path.rstrip('/').split('/')[-1]
+        if endpoint not in ENDPOINT_KEYS:
+            return StubResponse(404, json.dumps({'error': f"Unknown endpoint {endpoint}"}).encode())
+        body = json.loads(data)
+        key = (endpoint, body['startDate'], body['endDate'])
+        if key not in self._payloads:
+            tz = 'Europe/Istanbul'
+            start = pd.Timestamp(body['startDate']).tz_convert(tz).normalize()
+            end = pd.Timestamp(body['endDate']).tz_convert(tz).normalize() + pd.Timedelta(hours=23)
+            
+            items = self._recording(endpoint)
+            if items is not None:
+                first, last = start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d')
+                items = [item for item in items if first <= item['date'][:10] <= last]
+            else:
+                items = self._synthetic_items(endpoint, start, end)
+            self._payloads[key] = json.dumps({'items': items}).encode()
+        return StubResponse(200, self._payloads[key])
@@ -1,6 +1,11 @@
-from .core import GetData, UpdateData
+from ._lazy import lazy_exports
 
-__all__ = [
-    'GetData',
-    'UpdateData'
-]
\ No newline at end of file
+# Public names and the submodules they are defined in
+_EXPORTS = {
+    'GetData': '.core.get_data',
+    'UpdateData': '.core.update_data',
+}
+
+__all__ = list(_EXPORTS)
+
+__getattr__, __dir__ = lazy_exports(globals(), _EXPORTS)
@@ -0,0 +1,27 @@
+import importlib
+
+def lazy_exports(package_globals:dict, exports:dict) -> tuple:
+    """
+    Create the module __getattr__ and __dir__ of a package that imports its public names on first use,
+    so importing the package does not load pandas, requests or forex_python.
+
+    Args:
+        package_globals (dict): Globals of the package, the imported names are cached in them.
+        exports (dict): Public names and the submodules they are defined in, relative to the package.
+
+    Returns:
+        tuple: __getattr__ and __dir__ functions of the package.
+    """
+    package = package_globals['__name__']
+
+    def __getattr__(name:str):
+        if name not in exports:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(exports[name], package), name)
+        package_globals[name] = value
+        return value
+
+    def __dir__():
+        return sorted(set(package_globals) | set(package_globals['__all__']))
+
+    return __getattr__, __dir__
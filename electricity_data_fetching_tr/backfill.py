@@ -0,0 +1,43 @@
+"""Rebuild a dataset by fetching shards of the date range in parallel processes and merging them.
+
+    python -m electricity_data_fetching_tr.backfill run 2017-01-01 2024-06-18 --shards 8 --processes 8
+
+Shards can also be fetched on several nodes with the shard command and merged with the merge command,
+the shard files are named deterministically from the date range and the number of shards.
+"""
+import argparse
+
+from .core.backfill import Backfill
+from .core.storage import STORAGE_CLASSES
+
+def main(argv:list=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('command', choices=['run', 'shard', 'merge'])
+    parser.add_argument('start_date')
+    parser.add_argument('end_date')
+    parser.add_argument('--shards', type=int, default=None, help='Number of shards, defaults to the number of processes.')
+    parser.add_argument('--processes', type=int, default=None, help='Number of worker processes, defaults to the number of CPUs.')
+    parser.add_argument('--index', type=int, default=None, help='Index of the shard to fetch with the shard command.')
+    parser.add_argument('--name', default='data', help='Name of the merged dataset.')
+    parser.add_argument('--dataset-dir', default=None)
+    parser.add_argument('--shard-dir', default=None)
+    parser.add_argument('--storage', default='csv', choices=list(STORAGE_CLASSES))
+    parser.add_argument('--max-workers', type=int, default=4, help='Requests sent at the same time by every process.')
+    parser.add_argument('--keep-shards', action='store_true')
+    args = parser.parse_args(argv)
+
+    backfill = Backfill(
+        shards=args.shards, processes=args.processes, dataset_dir=args.dataset_dir, shard_dir=args.shard_dir,
+        storage=args.storage, max_workers=args.max_workers
+    )
+    if args.command == 'shard':
+        if args.index is None:
+            parser.error('--index is required by the shard command.')
+        print(backfill.run_shard(args.start_date, args.end_date, args.index, args.name))
+    elif args.command == 'merge':
+        print(backfill.merge(args.start_date, args.end_date, args.name, args.keep_shards))
+    else:
+        print(backfill.run(args.start_date, args.end_date, args.name, args.keep_shards))
+
+if __name__ == '__main__':
+    main()
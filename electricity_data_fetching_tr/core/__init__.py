@@ -1,9 +1,31 @@
-from .constants import DATASETS_DIRECTORY
-from .get_data import GetData
-from .update_data import UpdateData
+from .._lazy import lazy_exports
 
-__all__ = [
-    'DATASETS_DIRECTORY',
-    'GetData',
-    'UpdateData'
-]
\ No newline at end of file
+# Public names and the submodules they are defined in
+_EXPORTS = {
+    'DATASETS_DIRECTORY': '.constants',
+    'ExchangeRateProvider': '.exchange_rates',
+    'ExchangeRatesAPIProvider': '.exchange_rates',
+    'OfflineExchangeRateProvider': '.exchange_rates',
+    'CachedExchangeRateProvider': '.exchange_rates',
+    'Storage': '.storage',
+    'CSVStorage': '.storage',
+    'ParquetStorage': '.storage',
+    'FeatherStorage': '.storage',
+    'MemmapStorage': '.storage',
+    'DatasetReader': '.reader',
+    'CalendarFeatures': '.calendar',
+    'WindowPlanner': '.planner',
+    'FrameBuilder': '.frame',
+    'HourlySeries': '.series',
+    'Manifest': '.manifest',
+    'FeatureEngine': '.features',
+    'HotCache': '.hot_cache',
+    'GetData': '.get_data',
+    'UpdateData': '.update_data',
+    'Backfill': '.backfill',
+    'UpdateDaemon': '.daemon',
+}
+
+__all__ = list(_EXPORTS)
+
+__getattr__, __dir__ = lazy_exports(globals(), _EXPORTS)
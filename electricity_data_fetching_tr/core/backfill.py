@@ -0,0 +1,243 @@
+import os
+import time
+import shutil
+import inspect
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
+
+from .constants import DATASETS_DIRECTORY
+from .storage import STORAGE_CLASSES
+from .manifest import Manifest
+from .features import FeatureEngine
+from ..models import DATASET_CLASSES
+from ..utils.timeparse import parse_datetime
+
+def lag_hours(dataset_class) -> int:
+    """Get the default lag of a dataset class, e.g. 48 for BalancingMarketPrices."""
+    parameter = inspect.signature(dataset_class.get_data).parameters.get('lag_hours')
+    if parameter is None or parameter.default is inspect.Parameter.empty:
+        return 0
+    return parameter.default
+
+def _run_shard(start_date:str, end_date:str, dataset_dir:str, file_name:str, options:dict) -> tuple:
+    """Fetch a shard in a worker process, return the path of the shard and the elapsed time."""
+    from .get_data import GetData
+
+    start = time.perf_counter()
+    data = GetData(dataset_dir=dataset_dir, **options)
+    data.get_data(start_date, end_date, file_name=file_name)
+    return data.csv_file_name, time.perf_counter() - start
+
+class Backfill:
+    """Fetches a date range in shards with a process pool and merges the shards into a single dataset.
+    Every shard starts a few days before the previous one ends, so the hours shifted by the lags of the
+    datasets are fetched by both shards. The merge checks that the shards are continuous and agree on
+    these hours before writing them in order.
+    """
+    def __init__(self, shards:int=None, processes:int=None, dataset_dir:str=None, shard_dir:str=None, **options):
+        """
+        Initialize the Backfill class.
+
+        Args:
+            shards (int, optional): Number of shards. Defaults to the number of processes.
+            processes (int, optional): Number of worker processes. Defaults to the number of CPUs.
+            dataset_dir (str, optional): Directory of the merged dataset. Defaults to DATASETS_DIRECTORY.
+            shard_dir (str, optional): Directory of the shard files. Defaults to dataset_dir/shards.
+            **options: Passed to GetData in every worker, e.g. dataset_classes, storage or cache.
+            They are sent to the worker processes, so they must be picklable.
+        """
+        self.processes = processes if processes is not None else os.cpu_count() or 1
+        self.shards = shards if shards is not None else self.processes
+        if self.shards < 1 or self.processes < 1:
+            raise ValueError('shards and processes must be at least 1.')
+        self.dataset_dir = dataset_dir if dataset_dir is not None else DATASETS_DIRECTORY
+        self.shard_dir = shard_dir if shard_dir is not None else os.path.join(self.dataset_dir, 'shards')
+        self.options = options
+
+        dataset_classes = options.get('dataset_classes') or DATASET_CLASSES
+        storage = options.get('storage', 'csv')
+        self.storage_class = STORAGE_CLASSES[storage] if isinstance(storage, str) else storage
+        self.storage_options = options.get('storage_options') or {}
+        # Hours at the start of a shard that depend on the days before it.
+        self.overlap_days = max(1, -(-max(lag_hours(dataset_class) for dataset_class in dataset_classes) // 24))
+        # The features of the first hour of a shard need the hours of their lags and windows before it.
+        features = options.get('features')
+        if features is not None:
+            self.overlap_days = max(self.overlap_days, -(-features.history // 24))
+
+    def plan(self, start_date:str, end_date:str) -> list:
+        """
+        Split the date range into shards of whole days.
+
+        Args:
+            start_date (str): Start date.
+            end_date (str): End date.
+
+        Returns:
+            list: (first day, last day) tuples of the shards, without the overlap.
+        """
+        first_day = parse_datetime(start_date).replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=None)
+        last_day = parse_datetime(end_date).replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=None)
+        if last_day < first_day:
+            raise ValueError('End date must be greater than start date.')
+
+        n_days = (last_day - first_day).days + 1
+        n_shards = min(self.shards, n_days)
+        bounds = [first_day + timedelta(days=n_days * index // n_shards) for index in range(n_shards + 1)]
+        return [(bounds[index], bounds[index + 1] - timedelta(days=1)) for index in range(n_shards)]
+
+    def _shard_name(self, file_name:str, index:int, shard:tuple) -> str:
+        return f"{file_name}_shard{index:03d}_{shard[0].strftime('%Y%m%d')}_{shard[1].strftime('%Y%m%d')}"
+
+    def _shard_path(self, file_name:str, index:int, shard:tuple) -> str:
+        return os.path.join(self.shard_dir, self._shard_name(file_name, index, shard) + self.storage_class.extension)
+
+    def _fetch_range(self, index:int, shard:tuple) -> tuple:
+        """Get the fetched range of a shard, every shard but the first one includes the overlap."""
+        first_day = shard[0] if index == 0 else shard[0] - timedelta(days=self.overlap_days)
+        return first_day.strftime('%Y-%m-%d'), shard[1].strftime('%Y-%m-%d')
+
+    def run_shard(self, start_date:str, end_date:str, index:int, file_name:str='data') -> str:
+        """
+        Fetch a single shard in this process, e.g. to distribute the shards over several nodes.
+
+        Args:
+            start_date (str): Start date of the whole range.
+            end_date (str): End date of the whole range.
+            index (int): Index of the shard.
+            file_name (str, optional): Name of the merged dataset. Defaults to 'data'.
+
+        Returns:
+            str: Path of the shard.
+        """
+        shard = self.plan(start_date, end_date)[index]
+        os.makedirs(self.shard_dir, exist_ok=True)
+        path, _ = _run_shard(*self._fetch_range(index, shard), self.shard_dir, self._shard_name(file_name, index, shard), self.options)
+        return path
+
+    def fetch(self, start_date:str, end_date:str, file_name:str='data') -> list:
+        """
+        Fetch all the shards with the process pool.
+
+        Args:
+            start_date (str): Start date.
+            end_date (str): End date.
+            file_name (str, optional): Name of the merged dataset. Defaults to 'data'.
+
+        Returns:
+            list: Paths of the shards in order.
+        """
+        shards = self.plan(start_date, end_date)
+        os.makedirs(self.shard_dir, exist_ok=True)
+        with ProcessPoolExecutor(max_workers=min(self.processes, len(shards))) as executor:
+            futures = [
+                executor.submit(_run_shard, *self._fetch_range(index, shard), self.shard_dir, self._shard_name(file_name, index, shard), self.options)
+                for index, shard in enumerate(shards)
+            ]
+            return [future.result()[0] for future in futures]
+
+    def _validate(self, previous:pd.DataFrame, current:pd.DataFrame, boundary:datetime, index:int):
+        """
+        Check that two consecutive shards are continuous and agree on the hours both of them contain.
+
+        Args:
+            previous (pd.DataFrame): Data of the previous shard.
+            current (pd.DataFrame): Data of the shard, including the overlap.
+            boundary (datetime): First hour of the shard without the overlap.
+            index (int): Index of the shard.
+        """
+        if list(previous.columns) != list(current.columns):
+            raise ValueError(f"Columns of shards {index - 1} and {index} do not match.")
+        if previous.index[-1] != boundary - timedelta(hours=1) or boundary not in current.index:
+            raise ValueError(f"Shards {index - 1} and {index} are not continuous at {boundary}.")
+
+        overlap_previous = previous.loc[current.index[0]:]
+        overlap_current = current.loc[:previous.index[-1]]
+        if not overlap_previous.index.equals(overlap_current.index):
+            raise ValueError(f"Hours of shards {index - 1} and {index} do not match before {boundary}.")
+
+        # Hours missing in one of the shards are not compared, e.g. exchange rates that could not be filled
+        # at the start of a shard. Lagged values fetched for the wrong hours differ.
+        previous_values = overlap_previous.to_numpy(dtype='float64')
+        current_values = overlap_current.to_numpy(dtype='float64')
+        both = ~np.isnan(previous_values) & ~np.isnan(current_values)
+        mismatch = both & ~np.isclose(previous_values, current_values)
+        if mismatch.any():
+            row, column = np.argwhere(mismatch)[0]
+            raise ValueError(
+                f"Shards {index - 1} and {index} differ in {int(mismatch.sum())} values, "
+                f"first at {overlap_previous.index[row]} in {overlap_previous.columns[column]}."
+            )
+
+    def merge(self, start_date:str, end_date:str, file_name:str='data', keep_shards:bool=False) -> str:
+        """
+        Validate the shards and write them into a single dataset in order.
+
+        Args:
+            start_date (str): Start date.
+            end_date (str): End date.
+            file_name (str, optional): Name of the merged dataset. Defaults to 'data'.
+            keep_shards (bool, optional): Keep the shard files after merging. Defaults to False.
+
+        Returns:
+            str: Path of the merged dataset.
+        """
+        shards = self.plan(start_date, end_date)
+        paths = [self._shard_path(file_name, index, shard) for index, shard in enumerate(shards)]
+        missing = [path for path in paths if not os.path.exists(path)]
+        if missing:
+            raise FileNotFoundError(f"Missing shards: {', '.join(missing)}")
+
+        path = os.path.join(self.dataset_dir, file_name + self.storage_class.extension)
+        storage = self.storage_class(path, **self.storage_options)
+        manifest = Manifest(path + Manifest.suffix)
+        # Only two shards are kept in memory at a time.
+        previous = None
+        for index, (shard, shard_path) in enumerate(zip(shards, paths)):
+            df = self.storage_class(shard_path, **self.storage_options).read()
+            if not df.index.is_monotonic_increasing:
+                raise ValueError(f"Hours of shard {index} are not in order.")
+            if previous is not None:
+                self._validate(previous, df, shard[0], index)
+                df = df.loc[shard[0]:]
+            manifest.record(df, storage.write(df, append=index > 0), append=index > 0)
+            previous = df
+        manifest.save()
+        features = self.options.get('features')
+        if features is not None:
+            features.rebuild(storage)
+            features.save(FeatureEngine.path_for_storage(storage))
+
+        if not keep_shards:
+            for shard_path in paths:
+                if os.path.isdir(shard_path):
+                    shutil.rmtree(shard_path)
+                else:
+                    os.remove(shard_path)
+                for suffix in (Manifest.suffix, FeatureEngine.suffix):
+                    if os.path.exists(shard_path + suffix):
+                        os.remove(shard_path + suffix)
+            # The shard directory is only removed if it does not contain other files, e.g. shards of other datasets.
+            try:
+                os.rmdir(self.shard_dir)
+            except OSError:
+                pass
+        return path
+
+    def run(self, start_date:str, end_date:str, file_name:str='data', keep_shards:bool=False) -> str:
+        """
+        Fetch the shards in parallel and merge them.
+
+        Args:
+            start_date (str): Start date.
+            end_date (str): End date.
+            file_name (str, optional): Name of the merged dataset. Defaults to 'data'.
+            keep_shards (bool, optional): Keep the shard files after merging. Defaults to False.
+
+        Returns:
+            str: Path of the merged dataset.
+        """
+        self.fetch(start_date, end_date, file_name)
+        return self.merge(start_date, end_date, file_name, keep_shards)
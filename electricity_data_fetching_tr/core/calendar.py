@@ -0,0 +1,105 @@
+import os
+import threading
+import pandas as pd
+
+CALENDAR_COLUMNS = ['Day', 'Month', 'Year', 'Hour', 'Weekday', 'Holiday', 'Mod168']
+
+class CalendarFeatures:
+    """Adds the calendar columns to the hourly data.
+    The day-level features are built once per year range into a table, kept in memory for every instance
+    and optionally saved to a directory, and joined to the hours by position.
+    """
+    _tables = {}
+    _lock = threading.Lock()
+    
+    def __init__(self, cache_dir:str=None, calendar=None):
+        """
+        Initialize the CalendarFeatures class.
+
+        Args:
+            cache_dir (str, optional): Directory the day tables are saved to. Defaults to None.
+            calendar (workalendar.core.Calendar, optional): Calendar of the holidays. Defaults to Turkey.
+        """
+        self.cache_dir = cache_dir
+        self._calendar = calendar
+    
+    @property
+    def calendar(self):
+        if self._calendar is None:
+            from workalendar.europe import Turkey
+            self._calendar = Turkey()
+        return self._calendar
+    
+    def _build_table(self, start_year:int, end_year:int) -> pd.DataFrame:
+        days = pd.date_range(f"{start_year}-01-01", f"{end_year}-12-31", freq='D')
+        holidays = [day for year in range(start_year, end_year + 1) for day, _ in self.calendar.holidays(year)]
+        return pd.DataFrame({
+            'Day': days.day,
+            'Month': days.month,
+            'Year': days.year,
+            'Weekday': days.weekday,
+            'Holiday': days.isin(pd.DatetimeIndex(holidays)),
+        }, index=days).astype(float)
+    
+    def day_table(self, start_year:int, end_year:int) -> pd.DataFrame:
+        """
+        Get the day-level features of the given years.
+
+        Args:
+            start_year (int): First year.
+            end_year (int): Last year.
+
+        Returns:
+            pd.DataFrame: Day, Month, Year, Weekday and Holiday columns indexed by day.
+        """
+        calendar_name = type(self._calendar).__name__ if self._calendar is not None else 'Turkey'
+        key = (calendar_name, start_year, end_year)
+        with self._lock:
+            if key in self._tables:
+                return self._tables[key]
+        
+        path = None
+        if self.cache_dir is not None:
+            path = os.path.join(self.cache_dir, f"calendar_{calendar_name}_{start_year}_{end_year}.csv")
+        if path is not None and os.path.exists(path):
+            table = pd.read_csv(path, index_col=0, parse_dates=True)
+        else:
+            table = self._build_table(start_year, end_year)
+            if path is not None:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                table.to_csv(path)
+        
+        with self._lock:
+            self._tables[key] = table
+        return table
+    
+    def add_features(self, df:pd.DataFrame) -> pd.DataFrame:
+        """
+        Add the Day, Month, Year, Hour, Weekday, Holiday and Mod168 columns to the hourly data.
+
+        Args:
+            df (pd.DataFrame): Data with an hourly datetime index.
+
+        Returns:
+            pd.DataFrame: Data with the calendar columns.
+        """
+        if len(df) == 0:
+            for column in CALENDAR_COLUMNS:
+                df[column] = pd.Series(dtype=float)
+            return df
+        
+        days = df.index.normalize()
+        table = self.day_table(days.min().year, days.max().year)
+        # Position of the day of every hour in the table
+        positions = ((days - table.index[0]) // pd.Timedelta(days=1)).to_numpy()
+        hours = df.index.hour.to_numpy().astype(float)
+        
+        df['Day'] = table['Day'].to_numpy()[positions]
+        df['Month'] = table['Month'].to_numpy()[positions]
+        df['Year'] = table['Year'].to_numpy()[positions]
+        df['Hour'] = hours
+        df['Weekday'] = table['Weekday'].to_numpy()[positions]
+        df['Holiday'] = table['Holiday'].to_numpy()[positions]
+        # Hour of the week
+        df['Mod168'] = df['Weekday'] * 24 + df['Hour'] # TODO: Fix this...
+        return df
@@ -0,0 +1,219 @@
+import json
+import time
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .update_data import UpdateData
+from ..utils.profiling import get_profiler, logger
+
+class _HealthHandler(BaseHTTPRequestHandler):
+    """Serves /health as JSON and /metrics in the Prometheus text format."""
+    def do_GET(self):
+        daemon = self.server.update_daemon
+        if self.path == '/health':
+            health = daemon.health()
+            body = json.dumps(health).encode()
+            status = 200 if health['status'] == 'ok' else 503
+            content_type = 'application/json'
+        elif self.path == '/metrics':
+            body = daemon.metrics().encode()
+            status = 200
+            content_type = 'text/plain; version=0.0.4'
+        else:
+            body = b'Not found'
+            status = 404
+            content_type = 'text/plain'
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug('%s - %s', self.address_string(), format % args)
+
+class UpdateDaemon:
+    """Keeps a dataset up to date in a long running process.
+    New days are appended as soon as they start, and the recent days that are incomplete or may be revised
+    are fetched again with UpdateData.refetch when their data is due: datasets with a publication hour,
+    e.g. the day ahead prices at 14:00, are only requested for the next day after it, the others at most
+    every poll_interval seconds. The transport,
+    the pools and the caches stay warm between the polls.
+    """
+    def __init__(self, csv_name:str, tick:float=60, poll_interval:float=3600, retry_interval:float=300,
+                 host:str='127.0.0.1', port:int=None, **kwargs):
+        """
+        Initialize the UpdateDaemon class.
+
+        Args:
+            csv_name (str): Name of the dataset to update, passed to UpdateData.
+            tick (float, optional): Seconds between the checks of the manifest, no request is sent if nothing is due. Defaults to 60.
+            poll_interval (float, optional): Minimum seconds between the requests of a dataset without a publication hour. Defaults to 3600.
+            retry_interval (float, optional): Minimum seconds between the requests of a dataset that is due but still missing. Defaults to 300.
+            host (str, optional): Address of the health endpoint. Defaults to '127.0.0.1'.
+            port (int, optional): Port of the health endpoint, it is not served if None. Defaults to None.
+            **kwargs: Passed to UpdateData, e.g. dataset_dir, storage, transport, cache or refetch_days.
+        """
+        self.updater = UpdateData(csv_name, **kwargs)
+        if not self.updater.use_manifest:
+            raise ValueError('UpdateDaemon needs the manifest of the dataset.')
+        self.tick = tick
+        self.poll_interval = poll_interval
+        self.retry_interval = retry_interval
+        self.host = host
+        self.port = port
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._server = None
+        self._last_requests = {}
+        self.polls = 0
+        self.errors = 0
+        self.patches = {}
+        self.last_success = None
+        self.last_error = None
+        self.last_error_at = None
+
+    def _is_due(self, dataset_class, days:list, now:datetime) -> bool:
+        """
+        Check if the missing days of a dataset should be requested now.
+
+        Args:
+            dataset_class (type): Dataset class.
+            days (list): Days with missing hours in the format 'YYYY-MM-DD'.
+            now (datetime): Current time.
+
+        Returns:
+            bool: True if the dataset should be requested.
+        """
+        publication_hour = dataset_class.publication_hour
+        if publication_hour is not None:
+            # The next day is not published before the publication hour, only late data of the past days can be requested.
+            today = now.date().isoformat()
+            if now.hour < publication_hour and all(day > today for day in days):
+                return False
+            interval = self.retry_interval
+        else:
+            interval = self.poll_interval
+        last_request = self._last_requests.get(dataset_class)
+        return last_request is None or time.monotonic() - last_request >= interval
+
+    def poll_once(self) -> dict:
+        """
+        Append the new days and patch the due datasets once.
+
+        Returns:
+            dict: Number of changed days of every dataset class that was requested.
+        """
+        profiler = get_profiler()
+        now = datetime.now()
+        with profiler.span('UpdateDaemon.append'):
+            self.updater.get_data()
+
+        def select(dataset_class, days:list) -> bool:
+            if not self._is_due(dataset_class, days, now):
+                return False
+            self._last_requests[dataset_class] = time.monotonic()
+            return True
+
+        with profiler.span('UpdateDaemon.refetch'):
+            changed = self.updater.refetch(select)
+        with self._lock:
+            for name, n_days in changed.items():
+                if n_days:
+                    self.patches[name] = self.patches.get(name, 0) + 1
+        return changed
+
+    def _poll(self):
+        try:
+            patched = self.poll_once()
+        except Exception as e:
+            get_profiler().record_error('UpdateDaemon.poll', e)
+            logger.exception('Update failed')
+            with self._lock:
+                self.polls += 1
+                self.errors += 1
+                self.last_error = repr(e)
+                self.last_error_at = datetime.now()
+            return
+        if any(patched.values()):
+            logger.info('Patched %s', patched)
+        with self._lock:
+            self.polls += 1
+            self.last_success = datetime.now()
+
+    def run(self):
+        """Poll until stop() is called."""
+        while not self._stop.is_set():
+            self._poll()
+            self._stop.wait(self.tick)
+
+    def start(self):
+        """Start polling and serving the health endpoint in background threads."""
+        if self.port is not None and self._server is None:
+            self._server = ThreadingHTTPServer((self.host, self.port), _HealthHandler)
+            self._server.update_daemon = self
+            # With port 0 the system picks a free port.
+            self.port = self._server.server_address[1]
+            threading.Thread(target=self._server.serve_forever, name='UpdateDaemon.health', daemon=True).start()
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run, name='UpdateDaemon.poll', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop polling and the health endpoint."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def health(self) -> dict:
+        """Get the state of the daemon, the status is 'ok' if the last poll succeeded."""
+        manifest = self.updater.manifest
+        with self._lock:
+            failing = self.last_error_at is not None and (self.last_success is None or self.last_error_at > self.last_success)
+            return {
+                'status': 'error' if failing or self.last_success is None else 'ok',
+                'polls': self.polls,
+                'errors': self.errors,
+                'last_success': self.last_success.isoformat(timespec='seconds') if self.last_success else None,
+                'last_error': self.last_error,
+                'last_hour': manifest.last.isoformat() if manifest is not None and manifest.last is not None else None,
+                'incomplete_days': manifest.incomplete_days(datetime.now().date() - timedelta(days=self.updater.refetch_days)) if manifest is not None else [],
+            }
+
+    def metrics(self) -> str:
+        """Get the metrics of the daemon and the transport in the Prometheus text format."""
+        manifest = self.updater.manifest
+        with self._lock:
+            lines = [
+                f"electricity_updater_polls_total {self.polls}",
+                f"electricity_updater_errors_total {self.errors}",
+            ]
+            for name, count in sorted(self.patches.items()):
+                lines.append(f'electricity_updater_patches_total{{dataset="{name}"}} {count}')
+            if self.last_success is not None:
+                lines.append(f"electricity_updater_last_success_timestamp_seconds {self.last_success.timestamp():.0f}")
+        if manifest is not None and manifest.last is not None:
+            lines.append(f"electricity_updater_last_hour_timestamp_seconds {manifest.last.timestamp():.0f}")
+
+        get_stats = getattr(self.updater.transport, 'get_stats', None)
+        for endpoint, stats in sorted((get_stats() if get_stats else {}).items()):
+            for key in ('requests', 'retries', 'failures'):
+                lines.append(f'electricity_updater_http_{key}_total{{endpoint="{endpoint}"}} {stats[key]}')
+            lines.append(f'electricity_updater_http_mean_latency_seconds{{endpoint="{endpoint}"}} {stats["mean_latency"]:.6f}')
+        return '\n'.join(lines) + '\n'
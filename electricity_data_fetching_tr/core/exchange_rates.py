@@ -0,0 +1,147 @@
+import os
+import numpy as np
+import pandas as pd
+from datetime import date, timedelta
+
+from .constants import EXCHANGE_RATES_API_ACCESS_KEY
+from ..utils.transport import get_default_transport
+
+class ExchangeRateProvider:
+    """Base class of the exchange rate providers.
+    A provider returns the daily rates of a date range at once, so the rates can be joined to the hourly data.
+    """
+    def get_rates(self, start_date:date, end_date:date, base:str='TRY', target:str='USD') -> pd.Series:
+        """
+        Get the daily exchange rates between the given dates.
+
+        Args:
+            start_date (date): First day.
+            end_date (date): Last day.
+            base (str, optional): Currency that is converted. Defaults to 'TRY'.
+            target (str, optional): Currency that is converted to. Defaults to 'USD'.
+
+        Returns:
+            pd.Series: Amount of target currency for one unit of base currency, indexed by day.
+            Days without a rate are not included.
+        """
+        raise NotImplementedError
+
+class ExchangeRatesAPIProvider(ExchangeRateProvider):
+    """Gets the rates from https://exchangeratesapi.io/ with one timeseries request per year."""
+    url = 'https://api.exchangeratesapi.io/v1/timeseries'
+    max_days = 365
+    
+    def __init__(self, access_key:str=None, transport=None):
+        """
+        Initialize the ExchangeRatesAPIProvider class.
+
+        Args:
+            access_key (str, optional): API access key. Defaults to EXCHANGE_RATES_API_ACCESS_KEY.
+            transport (Transport, optional): Transport used to send the requests. Defaults to the shared transport.
+        """
+        self.access_key = access_key if access_key is not None else EXCHANGE_RATES_API_ACCESS_KEY
+        self.transport = transport if transport is not None else get_default_transport()
+    
+    def get_rates(self, start_date:date, end_date:date, base:str='TRY', target:str='USD') -> pd.Series:
+        if not self.access_key:
+            raise ValueError('Exchange rates API access key is not set (can be obtained from https://exchangeratesapi.io/).')
+        
+        rates = {}
+        window_start = start_date
+        while window_start <= end_date:
+            window_end = min(window_start + timedelta(days=self.max_days - 1), end_date)
+            response = self.transport.request(
+                'GET',
+                f"{self.url}?access_key={self.access_key}&start_date={window_start.isoformat()}"
+                f"&end_date={window_end.isoformat()}&symbols={target},{base}"
+            )
+            for day, day_rates in response['rates'].items():
+                rates[day] = day_rates[target] / day_rates[base]
+            window_start = window_end + timedelta(days=1)
+        
+        series = pd.Series(rates, dtype='float64')
+        series.index = pd.to_datetime(series.index)
+        return series.sort_index()
+
+class OfflineExchangeRateProvider(ExchangeRateProvider):
+    """Serves the rates from a local table, does not need network access."""
+    def __init__(self, rates):
+        """
+        Initialize the OfflineExchangeRateProvider class.
+
+        Args:
+            rates (pd.Series or dict): Rates indexed by day, in the same direction as get_rates returns them.
+        """
+        rates = pd.Series(rates, dtype='float64')
+        rates.index = pd.to_datetime(rates.index).normalize()
+        self.rates = rates.sort_index()
+    
+    @classmethod
+    def from_csv(cls, path:str, column:str='rate'):
+        """
+        Read the rates from a CSV file with a date column and a rate column.
+
+        Args:
+            path (str): Path of the CSV file.
+            column (str, optional): Name of the rate column. Defaults to 'rate'.
+        """
+        df = pd.read_csv(path, index_col=0, parse_dates=True)
+        return cls(df[column])
+    
+    def get_rates(self, start_date:date, end_date:date, base:str='TRY', target:str='USD') -> pd.Series:
+        return self.rates.loc[pd.Timestamp(start_date):pd.Timestamp(end_date)]
+
+class CachedExchangeRateProvider(ExchangeRateProvider):
+    """Keeps the rates of another provider in a CSV file, only the days that are not in the file are requested.
+    Past days the provider has no rate for are kept without a rate, so they are not requested again.
+    """
+    def __init__(self, provider:ExchangeRateProvider, path:str='exchange_rates.csv'):
+        """
+        Initialize the CachedExchangeRateProvider class.
+
+        Args:
+            provider (ExchangeRateProvider): Provider used for the days that are not cached.
+            path (str, optional): Path of the CSV file. Defaults to 'exchange_rates.csv'.
+        """
+        self.provider = provider
+        self.path = path
+        if os.path.exists(path):
+            self.table = pd.read_csv(path, parse_dates=['date'])
+        else:
+            self.table = pd.DataFrame({
+                'date': pd.Series(dtype='datetime64[ns]'),
+                'base': pd.Series(dtype='object'),
+                'target': pd.Series(dtype='object'),
+                'rate': pd.Series(dtype='float64'),
+            })
+    
+    def _cached_rates(self, base:str, target:str) -> pd.Series:
+        table = self.table[(self.table['base'] == base) & (self.table['target'] == target)]
+        return pd.Series(table['rate'].to_numpy(), index=pd.DatetimeIndex(table['date'])).sort_index()
+    
+    def get_rates(self, start_date:date, end_date:date, base:str='TRY', target:str='USD') -> pd.Series:
+        cached = self._cached_rates(base, target)
+        days = pd.date_range(start_date, end_date, freq='D')
+        missing_days = days.difference(cached.index)
+        # Days after today have no rate yet, they are requested once they have started.
+        today = pd.Timestamp(date.today())
+        missing_days = missing_days[missing_days <= today]
+        
+        if len(missing_days) > 0:
+            # A single request covers every missing day
+            new_rates = self.provider.get_rates(missing_days[0].date(), missing_days[-1].date(), base, target)
+            new_rates = new_rates[new_rates.index.isin(missing_days)]
+            # Past days without a rate, e.g. weekends, are stored without a rate, so they are not requested again.
+            unavailable = missing_days[(missing_days < today) & ~missing_days.isin(new_rates.index)]
+            new_table = pd.DataFrame({
+                'date': new_rates.index.append(unavailable),
+                'base': base,
+                'target': target,
+                'rate': np.concatenate([new_rates.to_numpy(dtype='float64'), np.full(len(unavailable), np.nan)]),
+            }).sort_values('date')
+            if len(new_table) > 0:
+                new_table.to_csv(self.path, mode='a', header=not os.path.exists(self.path), index=False)
+                self.table = pd.concat([self.table, new_table], ignore_index=True)
+                cached = self._cached_rates(base, target)
+        
+        return cached.loc[days[0]:days[-1]].dropna()
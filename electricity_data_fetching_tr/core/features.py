@@ -0,0 +1,263 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+
+from .series import HourlySeries, HOUR
+
+def lag(values:np.ndarray, hours:int) -> np.ndarray:
+    """Get the values shifted by the given number of hours, the first hours are NaN."""
+    shifted = np.full(len(values), np.nan)
+    if hours < len(values):
+        shifted[hours:] = values[:len(values) - hours]
+    return shifted
+
+def _window_sums(values:np.ndarray, window:int, offset:int) -> np.ndarray:
+    """
+    Get the sums of the last window values with prefix and suffix sums of blocks of window values.
+    The blocks are aligned to offset, so the sum of a window only depends on its values and not on the
+    values before it, and only adds up to window values, so the rounding errors do not grow with the history.
+    """
+    # An empty block is added before the first one, so every window starts in a block.
+    lead = window + offset % window
+    blocks = np.zeros(-(-(lead + len(values)) // window) * window)
+    blocks[lead:lead + len(values)] = values
+    blocks = blocks.reshape(-1, window)
+    prefix = np.cumsum(blocks, axis=1).ravel()
+    suffix = np.cumsum(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+
+    ends = np.arange(lead, lead + len(values))
+    starts = ends - window + 1
+    # A window that starts with a block is that block, the others end in the block after their start.
+    return np.where(starts % window == 0, prefix[ends], suffix[starts] + prefix[ends])
+
+def rolling_moments(values:np.ndarray, window:int, min_periods:int=None, offset:int=0) -> tuple:
+    """
+    Get the rolling mean and sample standard deviation of the last window hours with block sums.
+    Missing values are skipped, hours with less than min_periods values in their window are NaN.
+
+    Args:
+        values (np.ndarray): Hourly values.
+        window (int): Number of hours in the window, including the current hour.
+        min_periods (int, optional): Minimum number of values in the window. Defaults to window.
+        offset (int, optional): Hour of the first value, e.g. hours since the epoch, so the moments of an hour
+        are the same whichever hour the values start with. Defaults to 0.
+
+    Returns:
+        tuple: Rolling mean and standard deviation arrays.
+    """
+    min_periods = window if min_periods is None else min_periods
+    valid = ~np.isnan(values)
+    filled = np.where(valid, values, 0.0)
+
+    counts = np.concatenate(([0], np.cumsum(valid)))
+    ends = np.arange(1, len(values) + 1)
+    n = (counts[ends] - counts[np.maximum(ends - window, 0)]).astype('float64')
+    total = _window_sums(filled, window, offset)
+    squares = _window_sums(filled * filled, window, offset)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total / n
+        variance = np.maximum(squares - total * mean, 0.0) / (n - 1)
+        # Variances within the rounding errors of the sums are 0, e.g. for windows of capped prices.
+        variance[variance <= 1e-12 * squares / n] = 0.0
+    enough = n >= max(min_periods, 1)
+    return np.where(enough, mean, np.nan), np.where(enough & (n >= 2), np.sqrt(variance), np.nan)
+
+class FeatureEngine:
+    """Adds lagged values and rolling means and volatilities of the price columns to the data.
+    The last hours of the source columns are kept as state, so the features of new hours are computed
+    from the state and the new rows only, instead of the whole history. The state is saved next to the
+    dataset and updated with it.
+    """
+    suffix = '.features.npz'
+
+    def __init__(self, lags:dict=None, windows:dict=None, min_periods:dict=None, rewind_hours:int=168):
+        """
+        Initialize the FeatureEngine class.
+
+        Args:
+            lags (dict, optional): Lags in hours of every column, e.g. {'Price': [24, 168]}. 168 is the same hour of the last week.
+            Defaults to 24 and 168 hours for Price and BalancingMarketPrice.
+            windows (dict, optional): Rolling windows in hours of every column, the mean and the standard deviation
+            are added for each of them. Defaults to 24 and 168 hours for Price and BalancingMarketPrice.
+            min_periods (dict, optional): Minimum number of values in a window of every column. Defaults to the window, like pandas.
+            rewind_hours (int, optional): Hours kept in the state besides the longest lag or window, so the last days
+            can be computed again, e.g. by UpdateData with replace_last_day. Defaults to 168.
+        """
+        self.lags = {column: sorted(hours) for column, hours in (lags if lags is not None else {'Price': [24, 168], 'BalancingMarketPrice': [24, 168]}).items()}
+        self.windows = {column: sorted(hours) for column, hours in (windows if windows is not None else {'Price': [24, 168], 'BalancingMarketPrice': [24, 168]}).items()}
+        self.min_periods = dict(min_periods or {})
+        if any(hours < 1 for hours_list in [*self.lags.values(), *self.windows.values()] for hours in hours_list):
+            raise ValueError('Lags and windows must be at least 1 hour.')
+        self.rewind_hours = rewind_hours
+        self.sources = list(dict.fromkeys([*self.lags, *self.windows]))
+        # Hours before the first new hour that its features depend on.
+        self.history = max([hours for hours_list in [*self.lags.values(), *self.windows.values()] for hours in hours_list], default=0)
+        self.reset()
+
+    @classmethod
+    def path_for_storage(cls, storage) -> str:
+        """Get the path of the state of the dataset of a storage."""
+        return storage.path + cls.suffix
+
+    @property
+    def columns(self) -> list:
+        """Get the names of the feature columns, e.g. Price_lag24, Price_mean168 and Price_std168."""
+        columns = []
+        for column in self.sources:
+            columns += [f"{column}_lag{hours}" for hours in self.lags.get(column, [])]
+            for hours in self.windows.get(column, []):
+                columns += [f"{column}_mean{hours}", f"{column}_std{hours}"]
+        return columns
+
+    def _config(self) -> dict:
+        return {'lags': self.lags, 'windows': self.windows, 'min_periods': self.min_periods}
+
+    def reset(self):
+        """Forget the state, e.g. before the first window of a new dataset."""
+        self.state = None
+        # The state reaches back to the first hour of the dataset.
+        self.complete = True
+
+    def _compute(self, series:HourlySeries, first:int) -> dict:
+        """Compute the features of the hours of the series from the given position on."""
+        features = {}
+        # Hours since the epoch, the rolling sums of an hour do not depend on the first hour of the series.
+        offset = int(series.start.astype('int64'))
+        for column in self.sources:
+            values = series.column(column).astype('float64')
+            for hours in self.lags.get(column, []):
+                features[f"{column}_lag{hours}"] = lag(values, hours)[first:]
+            for hours in self.windows.get(column, []):
+                mean, std = rolling_moments(values, hours, self.min_periods.get(column), offset)
+                features[f"{column}_mean{hours}"] = mean[first:]
+                features[f"{column}_std{hours}"] = std[first:]
+        return {name: features[name] for name in self.columns}
+
+    def _check_sources(self, df:pd.DataFrame):
+        missing = [column for column in self.sources if column not in df.columns]
+        if missing:
+            raise ValueError(f"Missing source columns of the features: {', '.join(missing)}")
+
+    def transform(self, df:pd.DataFrame) -> pd.DataFrame:
+        """
+        Compute the features of the whole data without using or changing the state.
+
+        Args:
+            df (pd.DataFrame): Data with an hourly datetime index and the source columns.
+
+        Returns:
+            pd.DataFrame: Feature columns with the index of df.
+        """
+        self._check_sources(df)
+        series = HourlySeries.from_frame(df[self.sources], dtypes={})
+        return self._to_frame(self._compute(series, 0), series, df.index)
+
+    def _to_frame(self, features:dict, series:HourlySeries, index:pd.DatetimeIndex) -> pd.DataFrame:
+        """Align the features of the hours of the series with the index of the data, which may have gaps."""
+        if len(index) != len(series):
+            positions = (index.values.astype('datetime64[h]') - series.start) // HOUR
+            features = {name: values[positions] for name, values in features.items()}
+        return pd.DataFrame(features, index=index, copy=False)
+
+    def covers(self, start) -> bool:
+        """Check that the state contains the hours needed to compute the features from the given hour on."""
+        if self.state is None:
+            return self.complete
+        start = np.datetime64(start, 'h')
+        if start > self.state.end + HOUR:
+            # The hours between the state and the new rows are missing.
+            return False
+        return self.complete or start - self.history * HOUR >= self.state.start
+
+    def update(self, df:pd.DataFrame) -> pd.DataFrame:
+        """
+        Compute the features of new rows from the state and extend the state with them.
+        The rows may start before the end of the state, e.g. when the last days are fetched again, the
+        hours of the state from the first new hour on are replaced.
+
+        Args:
+            df (pd.DataFrame): New data with an hourly datetime index and the source columns.
+
+        Returns:
+            pd.DataFrame: Feature columns with the index of df.
+        """
+        self._check_sources(df)
+        if len(df) == 0:
+            return pd.DataFrame({name: np.empty(0) for name in self.columns}, index=df.index)
+        new = HourlySeries.from_frame(df[self.sources], dtypes={})
+        if not self.covers(new.start):
+            raise ValueError(f"The state of the features does not contain the hours before {new.start}.")
+
+        # The hours of the state before the first new hour are followed by the new hours.
+        state = self.state
+        start = new.start if state is None else min(state.start, new.start)
+        offset = int((new.start - start) // HOUR)
+        values = {}
+        for column in self.sources:
+            column_values = np.full(offset + len(new), np.nan)
+            if offset:
+                column_values[:offset] = state.column(column)[:offset]
+            column_values[offset:] = new.column(column)
+            values[column] = column_values
+        features = self._compute(HourlySeries(start, len(column_values), values), offset)
+
+        # Only the last hours are kept, enough for the history of the next rows and for rewinding.
+        drop = max(len(column_values) - self.history - self.rewind_hours, 0)
+        self.complete = self.complete and drop == 0
+        self.state = HourlySeries(start + drop * HOUR, len(column_values) - drop, {column: column_values[drop:] for column, column_values in values.items()})
+        return self._to_frame(features, new, df.index)
+
+    def rebuild(self, storage, n_rows:int=None):
+        """
+        Rebuild the state from the last rows of a dataset, e.g. if it is missing or out of date.
+
+        Args:
+            storage (Storage): Storage of the dataset.
+            n_rows (int, optional): Number of rows to read. Defaults to the hours kept in the state.
+        """
+        n_rows = max(n_rows or 0, self.history + self.rewind_hours)
+        df = storage.read_tail(n_rows) if storage.exists() else pd.DataFrame()
+        self.reset()
+        if len(df):
+            self._check_sources(df)
+            self.state = HourlySeries.from_frame(df[self.sources], dtypes={})
+            self.complete = len(df) < n_rows
+
+    def save(self, path:str):
+        """Write the state atomically."""
+        if self.state is None:
+            if os.path.exists(path):
+                os.remove(path)
+            return
+        arrays = {f"column_{column}": self.state.column(column) for column in self.sources}
+        meta = dict(self._config(), start=str(self.state.start), complete=self.complete)
+        with open(path + '_temp', 'wb') as f:
+            np.savez(f, meta=np.array(json.dumps(meta)), **arrays)
+        os.replace(path + '_temp', path)
+
+    def load(self, path:str) -> bool:
+        """
+        Read the state, a missing state or one saved with other lags or windows is ignored.
+
+        Args:
+            path (str): Path of the state.
+
+        Returns:
+            bool: True if the state was loaded.
+        """
+        self.reset()
+        if not os.path.exists(path):
+            return False
+        try:
+            with np.load(path) as content:
+                meta = json.loads(str(content['meta']))
+                columns = {column: content[f"column_{column}"] for column in self.sources}
+        except (OSError, ValueError, KeyError):
+            return False
+        config = self._config()
+        if json.loads(json.dumps(config)) != {key: meta[key] for key in config}:
+            return False
+        self.state = HourlySeries(np.datetime64(meta['start'], 'h'), len(next(iter(columns.values()))), columns)
+        self.complete = meta['complete']
+        return True
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+from datetime import datetime, time
+
+class FrameBuilder:
+    """Assembles the data of a window into a single DataFrame.
+    The hourly index of the window is created once and every column is written into a preallocated
+    float64 array, instead of concatenating the DataFrames of the datasets one by one.
+    """
+    def __init__(self, start_date:datetime, end_date:datetime):
+        """
+        Initialize the FrameBuilder class.
+
+        Args:
+            start_date (datetime): Start date of the window, the data starts at 00:00 of this day.
+            end_date (datetime): End date of the window, the data ends at 23:00 of this day.
+        """
+        self.index = pd.date_range(
+            datetime.combine(start_date.date(), time(0)), datetime.combine(end_date.date(), time(23)), freq='h', name='date'
+        )
+        self._columns = {}
+    
+    def column(self, name:str) -> np.ndarray:
+        """Get the array of a column, it is allocated with NaN values on first use."""
+        if name not in self._columns:
+            self._columns[name] = np.full(len(self.index), np.nan)
+        return self._columns[name]
+    
+    def add(self, df:pd.DataFrame):
+        """
+        Write the columns of a dataset into the window. Hours outside of the window are ignored,
+        for repeated hours the last value is kept.
+
+        Args:
+            df (pd.DataFrame): Data with an hourly datetime index.
+        """
+        positions = self.index.get_indexer(df.index)
+        inside = positions >= 0
+        positions = positions[inside]
+        for name in df.columns:
+            self.column(name)[positions] = df[name].to_numpy(dtype='float64', na_value=np.nan)[inside]
+    
+    def build(self) -> pd.DataFrame:
+        """Get the DataFrame of the window, the arrays are not copied."""
+        return pd.DataFrame(self._columns, index=self.index, copy=False)
@@ -1,18 +1,31 @@
 from .constants import DATASETS_DIRECTORY, EXCHANGE_RATES_API_ACCESS_KEY
+from .exchange_rates import ExchangeRatesAPIProvider
+from .storage import STORAGE_CLASSES
+from .calendar import CalendarFeatures, CALENDAR_COLUMNS
+from .planner import WindowPlanner
+from .frame import FrameBuilder
+from .manifest import Manifest
+from .features import FeatureEngine
 from ..models import *
+from ..models.base import dataset_kwargs
+from ..utils.profiling import get_profiler
+from ..utils.timeparse import parse_datetime
+from ..utils.transport import get_default_transport
 
 import os
 import pytz
 import json
-import requests
+import numpy as np
 import pandas as pd
-from dateutil import parser
-from datetime import datetime, timedelta
-from workalendar.europe import Turkey
-from forex_python.converter import CurrencyRates
+from collections import deque
+from contextlib import closing
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 
 class GetData:
-    def __init__(self, dataset_classes:list=None, tz:str='Europe/Istanbul', dataset_dir=None):
+    def __init__(self, dataset_classes:list=None, tz:str='Europe/Istanbul', dataset_dir=None, max_workers:int=4, transport=None, cache=None, exchange_rate_provider=None,
+                 storage='csv', storage_options:dict=None, calendar_features=None,
+                 planner=None, prefetch_windows:int=None, manifest:bool=True, features:FeatureEngine=None):
         """
             Initialize the GetData class.
 
@@ -21,15 +34,68 @@ class GetData:
             Defaults to DATASET_CLASSES.
             tz (str, optional): Timezone. Defaults to 'Europe/Istanbul'.
             dataset_dir (str, optional): Directory to save the datasets. Defaults to None.
+            max_workers (int, optional): Maximum number of requests sent to the API at the same time.
+            Use 1 to fetch the datasets one after another. Defaults to 4.
+            transport (Transport, optional): Transport used to send the requests. Defaults to the shared transport.
+            cache (ResponseCache, optional): Cache of the API responses. Defaults to None.
+            exchange_rate_provider (ExchangeRateProvider, optional): Provides the exchange rates of the hours
+            without day ahead prices. Defaults to ExchangeRatesAPIProvider if an access key is set.
+            storage (str or type, optional): Storage backend of the datasets, 'csv', 'parquet', 'feather'
+            or a Storage subclass. Defaults to 'csv'.
+            storage_options (dict, optional): Passed to the storage backend, e.g. partition_by or float_dtype. Defaults to None.
+            calendar_features (CalendarFeatures, optional): Adds the calendar columns. Defaults to CalendarFeatures().
+            planner (WindowPlanner, optional): Splits the requested range into windows. Defaults to WindowPlanner(dataset_classes).
+            prefetch_windows (int, optional): Maximum number of windows fetched ahead of the window being processed,
+            bounds the memory used. Defaults to enough windows to keep max_workers busy, at least 2.
+            manifest (bool, optional): Keep a manifest of the written days next to the dataset, see Manifest. Defaults to True.
+            features (FeatureEngine, optional): Adds the lagged and rolling features to the written datasets, its state
+            is saved next to the dataset. Defaults to None.
         """
+        if max_workers < 1:
+            raise ValueError('max_workers must be at least 1.')
+        if prefetch_windows is not None and prefetch_windows < 1:
+            raise ValueError('prefetch_windows must be at least 1.')
         if dataset_classes is None:
             dataset_classes = DATASET_CLASSES
+        if len(dataset_classes) == 0:
+            raise ValueError('dataset_classes must contain at least one dataset class.')
         
         self.dataset_dir = dataset_dir if dataset_dir is not None else DATASETS_DIRECTORY
         
         self.tz = tz
         self.dataset_classes = dataset_classes
-        self.c = CurrencyRates()
+        self.max_workers = max_workers
+        self.transport = transport if transport is not None else get_default_transport()
+        self.cache = cache
+        if exchange_rate_provider is None and EXCHANGE_RATES_API_ACCESS_KEY:
+            exchange_rate_provider = ExchangeRatesAPIProvider(transport=self.transport)
+        self.exchange_rate_provider = exchange_rate_provider
+        self.storage_class = STORAGE_CLASSES[storage] if isinstance(storage, str) else storage
+        self.storage_options = storage_options if storage_options is not None else {}
+        self._calendar_features = calendar_features
+        self.planner = planner if planner is not None else WindowPlanner(self.dataset_classes)
+        if prefetch_windows is None:
+            prefetch_windows = max(2, -(-max_workers // len(self.dataset_classes)))
+        self.prefetch_windows = prefetch_windows
+        self.use_manifest = manifest
+        self.manifest = None
+        self.features = features
+        self._c = None
+    
+    @property
+    def calendar_features(self) -> CalendarFeatures:
+        """Adds the calendar columns, created on first use."""
+        if self._calendar_features is None:
+            self._calendar_features = CalendarFeatures()
+        return self._calendar_features
+    
+    @property
+    def c(self):
+        """forex_python converter used by _get_exchange_rate, created on first use."""
+        if self._c is None:
+            from forex_python.converter import CurrencyRates
+            self._c = CurrencyRates()
+        return self._c
     
     def _convert_datetime_str(self, dt:datetime) -> str:
         """
@@ -49,7 +115,7 @@ class GetData:
     def _parse_datetime(self, date_str:str) -> datetime:
         """
         Parse a string to a datetime object.
-        Tries different formats to parse the string.
+        ISO 8601 strings are parsed directly, other formats are guessed.
         
         Args:
             date_str (str): Datetime string.
@@ -57,7 +123,7 @@ class GetData:
         Returns:
             datetime: Datetime object.
         """
-        return parser.parse(date_str)
+        return parse_datetime(date_str)
 
 
     def _send_request(self, url:str, body:dict=None, headers:dict=None, method:str='GET'):
@@ -82,42 +148,106 @@ class GetData:
                 headers['Content-Type'] = 'application/json'
         else: body = None
         
-        response = requests.request(method, url, headers=headers, data=body)
-
-        return response.json()
+        return self.transport.request(method, url, headers=headers, data=body)
     
-    def _get_exchange_rate_api(self, date:datetime, base:str='TRY', target:str='USD', shift_days:int=2):
-        if EXCHANGE_RATES_API_ACCESS_KEY is None:
-            EXCHANGE_RATES_API_ACCESS_KEY = input('Enter the exchange rates API access key (can be obtained from https://exchangeratesapi.io/): ')
-        date = (date - timedelta(days=shift_days)).strftime('%Y-%m-%d')
-        response = requests.get(f"http://api.exchangeratesapi.io/v1/{date}?access_key={EXCHANGE_RATES_API_ACCESS_KEY}&symbols={target},{base}")
-        return response.json()['rates'][target] / response.json()['rates'][base]
+    def _get_exchange_rates(self, index:pd.DatetimeIndex, base:str='TRY', target:str='USD', shift_days:int=2) -> np.ndarray:
+        """
+        Get the exchange rates of the given hours with a single call to the exchange rate provider.
+        The rate of an hour is the rate of the day shift_days days before it.
 
+        Args:
+            index (pd.DatetimeIndex): Hours to get the rates of.
+            base (str, optional): Currency that is converted. Defaults to 'TRY'.
+            target (str, optional): Currency that is converted to. Defaults to 'USD'.
+            shift_days (int, optional): Number of days the rates are shifted. Defaults to 2.
+
+        Returns:
+            np.ndarray: Rates aligned with the index, NaN for the days without a rate.
+        """
+        days = index.normalize()
+        shift = pd.Timedelta(days=shift_days)
+        rates = self.exchange_rate_provider.get_rates((days.min() - shift).date(), (days.max() - shift).date(), base, target)
+        rates.index = rates.index.normalize() + shift
+        return rates.reindex(days).to_numpy(dtype='float64')
     
     def _get_exchange_rate(self, date:datetime, base:str='TRY', target:str='USD'):
         return self.c.get_rate(base, target, date)
     
     def _convert_currency(self, df:pd.DataFrame, base:str='TRY', target:str='USD'):
-        # TOO SLOW!!!!
-        unique_dates = pd.Series(df.index.date).unique()
-        exchange_rates = {date: self._get_exchange_rate(datetime(date.year, date.month, date.day), base, target) for date in unique_dates}
-        df['ExchangeRate'] = df.index.map(lambda x: exchange_rates[x.date()])
-        
-        df['BalancingMarketPrice'] = df['BalancingMarketPrice'] * df['ExchangeRate']
-        df['Price'] = df['Price'] * df['ExchangeRate']
+        if self.exchange_rate_provider is not None:
+            exchange_rates = self._get_exchange_rates(df.index, base, target, shift_days=0)
+        else:
+            # Without a provider, the rate of every day is requested from forex_python.
+            days = df.index.normalize()
+            rates = {day: self._get_exchange_rate(day.to_pydatetime().replace(tzinfo=None), base, target) for day in days.unique()}
+            exchange_rates = days.map(rates).to_numpy(dtype='float64')
         
-        del df['ExchangeRate']
+        df['BalancingMarketPrice'] = df['BalancingMarketPrice'] * exchange_rates
+        df['Price'] = df['Price'] * exchange_rates
         return df
     
+    def _dataset_kwargs(self) -> dict:
+        """Get the keyword arguments shared by all the dataset classes."""
+        return {'transport': self.transport, 'cache': self.cache}
+    
+    def _fetch_part(self, dataset_class, part) -> pd.DataFrame:
+        """
+        Fetch a request of a dataset for a window. Runs in a worker thread.
+
+        Args:
+            dataset_class (type): Dataset class the request belongs to.
+            part (callable): Request returned by the parts of the dataset.
+
+        Returns:
+            pd.DataFrame: Data of the request.
+        """
+        with get_profiler().span(f"{dataset_class.__name__}.get_data"):
+            return part()
+
+    def _submit_dataset(self, executor:ThreadPoolExecutor, dataset_class, start_time_iso:str, end_time_iso:str) -> tuple:
+        """
+        Submit the requests of a dataset for a window to the pool, every request is a separate task.
+
+        Args:
+            executor (ThreadPoolExecutor): Pool of the requests.
+            dataset_class (type): Dataset class to fetch.
+            start_time_iso (str): Start date in ISO 8601 format.
+            end_time_iso (str): End date in ISO 8601 format.
+
+        Returns:
+            tuple: Dataset instance and the futures of its requests.
+        """
+        dataset = dataset_class(start_time_iso, end_time_iso, self.tz, **dataset_kwargs(dataset_class, self._dataset_kwargs()))
+        # Datasets that are not Data subclasses are fetched with a single get_data.
+        parts = dataset.parts() if hasattr(dataset, 'parts') else [dataset.get_data]
+        return dataset, [executor.submit(self._fetch_part, dataset_class, part) for part in parts]
+
+    def _open_storage(self, path:str):
+        """
+        Create the storage backend of the dataset at the given path.
+
+        Args:
+            path (str): Path of the dataset, including the extension.
+
+        Returns:
+            Storage: Storage backend of the dataset.
+        """
+        return self.storage_class(path, **self.storage_options)
+    
     def get_data(self, start_date:str, end_date:str, file_name='data', csv_to_update:str=None):
         """
         Get data from the dataset API and write it to a CSV file generated with start and end dates.
         If csv_to_update is not None, append the data to the file.
+        The data is written with the storage backend, CSV by default.
         Args:
             start_date (str): Start date in the format 'YYYY-MM-DD HH:MM:SS'.
             end_date (str): End date in the format 'YYYY-MM-DD HH:MM:SS'.
-            csv_to_update (str, optional): Path of the CSV file to update. Defaults to None.
+            csv_to_update (str, optional): Path of the dataset to update. Defaults to None.
         """
+        with get_profiler().span('GetData.get_data'):
+            self._get_data(start_date, end_date, file_name, csv_to_update)
+    
+    def _get_data(self, start_date:str, end_date:str, file_name='data', csv_to_update:str=None):
         start_date_dt = self._parse_datetime(start_date)
         end_date_dt = self._parse_datetime(end_date)
         
@@ -130,10 +260,20 @@ class GetData:
                 raise FileNotFoundError('The file does not exist.')
             self.csv_file_name = csv_to_update
         else:
+            extension = self.storage_class.extension
             if file_name:
-                self.csv_file_name = f"{self.dataset_dir}/{file_name}.csv"
+                self.csv_file_name = f"{self.dataset_dir}/{file_name}{extension}"
             else:
-                self.csv_file_name = f"{self.dataset_dir}/dataset_electricity_{start_date_dt.strftime('%Y-%m-%d')}_{end_date_dt.strftime('%Y-%m-%d')}.csv"
+                self.csv_file_name = f"{self.dataset_dir}/dataset_electricity_{start_date_dt.strftime('%Y-%m-%d')}_{end_date_dt.strftime('%Y-%m-%d')}{extension}"
+        self.storage = self._open_storage(self.csv_file_name)
+        # An update continues the manifest prepared by UpdateData, a new dataset starts a new one.
+        if self.use_manifest and (csv_to_update is None or self.manifest is None):
+            self.manifest = Manifest.for_storage(self.storage)
+        elif not self.use_manifest:
+            self.manifest = None
+        # An update continues from the state of the features prepared by UpdateData.
+        if self.features is not None and csv_to_update is None:
+            self.features.reset()
         
         if end_date_dt < start_date_dt:
             raise ValueError('End date must be greater than start date.')
@@ -144,72 +284,233 @@ class GetData:
         # except TypeError as e:
         #     if end_date_dt > datetime.now():
         #         raise ValueError('End date must be less than current date.')
-            
-        windows = list()
-        if end_date_dt - start_date_dt > timedelta(days=3*365):
-            # API only accepts requests for 3 years at most, paginate if more is requested.
-            while start_date_dt <= end_date_dt:
-                temp_end_date = min(start_date_dt + timedelta(days=3*365), end_date_dt)
-                windows.append((start_date_dt, temp_end_date))
-                start_date_dt = temp_end_date + timedelta(days=1)
-        else:
-            windows.append((start_date_dt, end_date_dt))
-        
-        tr_calendar = Turkey()
-        for index, (start_time, end_time) in enumerate(windows):
-            df = pd.DataFrame()
-            start_time_iso = self._convert_datetime_str(start_time)
-            end_time_iso = self._convert_datetime_str(end_time)
-            for dataset_class in self.dataset_classes:
-                try:
-                    df_temp = dataset_class(start_time_iso, end_time_iso, self.tz).get_data()
-                    df = pd.concat([df, df_temp], axis=1)
-                # Add Day, Month, Year, Hour, Weekday columns
-                
-                except Exception as e:
-                    print(f"Error: {e}")
-                    continue
-            
-            # Convert to datetime index
-            if not isinstance(df.index, pd.DatetimeIndex):
-                df.index = pd.to_datetime(df.index)
+        
+        # Windows are written by a separate thread, so writing a window overlaps with fetching and
+        # building the next ones. Only one write is pending at a time.
+        with ThreadPoolExecutor(max_workers=1) as writer, closing(self._iter_windows(start_date_dt, end_date_dt)) as frames:
+            pending_write = None
+            for index, df in enumerate(frames):
+                # The features of a window depend on the previous windows, so they are added in order.
+                df = self._add_features(df)
+                if pending_write is not None:
+                    pending_write.result()
+                pending_write = writer.submit(self._write_window, df, index > 0 or csv_to_update is not None)
+            if pending_write is not None:
+                pending_write.result()
+        
+        if self.manifest is not None:
+            self.manifest.save()
+        if self.features is not None:
+            self.features.save(FeatureEngine.path_for_storage(self.storage))
+    
+    def _add_features(self, df:pd.DataFrame) -> pd.DataFrame:
+        """Add the features of the rows of a window and extend the state of the features with them."""
+        if self.features is None:
+            return df
+        with get_profiler().span('GetData.features'):
+            features = self.features.update(df)
+            for name in features.columns:
+                df[name] = features[name].to_numpy()
+        return df
+    
+    def _write_window(self, df:pd.DataFrame, append:bool):
+        """Write a window to the storage. Runs in the writer thread."""
+        # If this is the first window, create the dataset, append to it otherwise.
+        with get_profiler().span('GetData.write'):
+            offsets = self.storage.write(df, append=append)
+            if self.manifest is not None:
+                self.manifest.record(df, offsets, append=append)
+    
+    def iter_windows(self, start_date:str, end_date:str):
+        """
+        Get the data window by window without writing it anywhere.
+        The next windows are fetched while the caller processes the current one, at most prefetch_windows
+        windows are fetched ahead so the memory stays bounded.
+
+        Args:
+            start_date (str): Start date in the format 'YYYY-MM-DD HH:MM:SS'.
+            end_date (str): End date in the format 'YYYY-MM-DD HH:MM:SS'.
+
+        Yields:
+            pd.DataFrame: Data of every window, in order.
+        """
+        start_date_dt = self._parse_datetime(start_date)
+        end_date_dt = self._parse_datetime(end_date)
+        if end_date_dt < start_date_dt:
+            raise ValueError('End date must be greater than start date.')
+        yield from self._iter_windows(start_date_dt, end_date_dt)
+    
+    def fetch_frame(self, start_date:str, end_date:str, columns:list=None) -> pd.DataFrame:
+        """
+        Get the data as a DataFrame without writing it anywhere.
+        Only the datasets needed for the requested columns are fetched. The transport and the cache are
+        shared with get_data.
+
+        Args:
+            start_date (str): Start date in the format 'YYYY-MM-DD HH:MM:SS'.
+            end_date (str): End date in the format 'YYYY-MM-DD HH:MM:SS'.
+            columns (list, optional): Columns to return, e.g. ['Price', 'Hour']. Defaults to all the columns.
+
+        Returns:
+            pd.DataFrame: Data with an hourly datetime index.
+        """
+        if columns is None:
+            columns = self.columns()
+        dataset_classes = self._select_dataset_classes(columns)
+        
+        start_date_dt = self._parse_datetime(start_date)
+        end_date_dt = self._parse_datetime(end_date)
+        if end_date_dt < start_date_dt:
+            raise ValueError('End date must be greater than start date.')
+        
+        with get_profiler().span('GetData.fetch_frame'):
+            frames = list(self._iter_windows(start_date_dt, end_date_dt, dataset_classes))
+            df = frames[0] if len(frames) == 1 else pd.concat(frames)
+            # Without a stored state, the features of the first hours are computed from the requested range only.
+            if self.features is not None and set(columns).intersection(self.features.columns):
+                df = df.join(self.features.transform(df))
+        return df[list(columns)]
+    
+    def columns(self, features:bool=True) -> list:
+        """Get the columns of the data, in the order they are written, with the feature columns unless features is False."""
+        columns = [
+            column for dataset_class in self.dataset_classes for column in dataset_class.columns
+            if column != 'PriceTry'
+        ]
+        columns += CALENDAR_COLUMNS
+        if features and self.features is not None:
+            columns += self.features.columns
+        return columns
+    
+    def _select_dataset_classes(self, columns:list) -> list:
+        """
+        Get the dataset classes needed for the given columns.
+
+        Args:
+            columns (list): Columns of the data.
+
+        Returns:
+            list: Dataset classes in the order of dataset_classes.
+        """
+        unknown = set(columns) - set(self.columns())
+        if unknown:
+            raise ValueError(f"Unknown columns: {', '.join(sorted(unknown))}")
+        
+        needed = set(columns)
+        if self.features is not None and needed.intersection(self.features.columns):
+            needed.update(self.features.sources)
+        # BalancingMarketPrice is converted with the exchange rate of the day ahead prices.
+        if 'BalancingMarketPrice' in needed:
+            needed.update(['PriceTry', 'Price'])
+        return [dataset_class for dataset_class in self.dataset_classes if needed.intersection(dataset_class.columns)]
+    
+    def _iter_windows(self, start_date_dt:datetime, end_date_dt:datetime, dataset_classes:list=None):
+        if dataset_classes is None:
+            dataset_classes = self.dataset_classes
+        
+        # Windows are sized to the limits of the endpoints and fetched in parallel.
+        windows = iter(self.planner.plan(start_date_dt, end_date_dt))
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        pending = deque()
+        try:
+            while True:
+                # Send the requests of every dataset for the next windows, the pool caps the concurrency.
+                for start_time, end_time in windows:
+                    start_time_iso = self._convert_datetime_str(start_time)
+                    end_time_iso = self._convert_datetime_str(end_time)
+                    pending.append((start_time, end_time, [
+                        self._submit_dataset(executor, dataset_class, start_time_iso, end_time_iso)
+                        for dataset_class in dataset_classes
+                    ]))
+                    if len(pending) >= self.prefetch_windows:
+                        break
+                if not pending:
+                    break
                 
-            # Add new columns
-            df['Day'] = df.index.day.astype(float)
-            df['Month'] = df.index.month.astype(float)
-            df['Year'] = df.index.year.astype(float)
-            df['Hour'] = df.index.hour.astype(float)
-            df['Weekday'] = df.index.weekday.astype(float)
-            df['Holiday'] = df.index.map(lambda x: tr_calendar.is_holiday(x.date())).astype(float)
-            # Hour of the week
-            df['Mod168'] = (df['Weekday']) * 24 + df['Hour'] # TODO: Fix this...
-            
-            # Get the currency using the price in TRY and USD
-            # can't calculate exchange rate if price is 0. Try to get it another way.
-            # Causes slight errors if the BalancingMarketPrices are shifted
-            df['ExchangeRate'] = df['Price'] / df['PriceTry']
-            
-            # Find missing exchange rates _get_exchange_rate
-            missing_exchange_rates = df[df['ExchangeRate'].isna()].index
-            exchange_rates_cache = {}
-            for date in missing_exchange_rates:
-                try:
-                    if date.date() not in exchange_rates_cache:
-                        exchange_rates_cache[date.date()] = self._get_exchange_rate_api(date)
-                    df.loc[date, 'ExchangeRate'] = exchange_rates_cache[date.date()]
-                except:
-                    continue
-            
-            # Fill the rest of na values with the previous value
-            df['ExchangeRate'] = df['ExchangeRate'].ffill().astype('float')
-            
-            df['BalancingMarketPrice'] = df['BalancingMarketPrice'] * df['ExchangeRate']
-            
-            df.drop(columns=['PriceTry', 'ExchangeRate'], inplace=True)
-            
-            if index == 0 and csv_to_update == None:
-                # If this is the first iteration, create the file and write the data to it.
-                df.to_csv(self.csv_file_name)
-            else:
-                # Append the data to the file.
-                df.to_csv(self.csv_file_name, mode='a', header=False)
+                # Join the results in the order of dataset_classes, windows are yielded in order.
+                start_time, end_time, futures = pending.popleft()
+                yield self._build_window(futures, start_time, end_time, dataset_classes)
+        finally:
+            # Requests of the windows that will not be used are not sent if the caller stops early.
+            executor.shutdown(wait=True, cancel_futures=True)
+    
+    def _build_window(self, futures:list, start_time:datetime, end_time:datetime, dataset_classes:list) -> pd.DataFrame:
+        """
+        Wait for the datasets of a window and add the features to them.
+
+        Args:
+            futures (list): Dataset instances and the futures of their requests in the order of dataset_classes.
+            start_time (datetime): Start date of the window.
+            end_time (datetime): End date of the window.
+            dataset_classes (list): Dataset classes that were fetched.
+
+        Returns:
+            pd.DataFrame: Data of the window.
+        """
+        profiler = get_profiler()
+        frame = FrameBuilder(start_time, end_time)
+        # The columns of the datasets that could not be fetched are left empty.
+        for dataset_class in dataset_classes:
+            for column in dataset_class.columns:
+                frame.column(column)
+        for dataset, dataset_futures in futures:
+            try:
+                with profiler.span('GetData.wait'):
+                    frames = [future.result() for future in dataset_futures]
+                    df_temp = dataset.combine(frames) if hasattr(dataset, 'combine') else frames[0]
+                with profiler.span('GetData.join'):
+                    frame.add(df_temp)
+            except Exception as e:
+                profiler.record_error('GetData.fetch', e)
+                print(f"Error: {e}")
+                continue
+        df = frame.build()
+        
+        # Add Day, Month, Year, Hour, Weekday, Holiday and Mod168 columns
+        with profiler.span('GetData.calendar'):
+            df = self.calendar_features.add_features(df)
+        
+        if 'BalancingMarketPrice' in df.columns:
+            df = self._convert_balancing_market_prices(df)
+        
+        df.drop(columns=['PriceTry'], errors='ignore', inplace=True)
+        
+        return df
+    
+    def _convert_balancing_market_prices(self, df:pd.DataFrame) -> pd.DataFrame:
+        """
+        Convert the balancing market prices to USD with the exchange rate of every hour.
+
+        Args:
+            df (pd.DataFrame): Data of a window.
+
+        Returns:
+            pd.DataFrame: Data with the converted prices.
+        """
+        profiler = get_profiler()
+        # Get the currency using the price in TRY and USD
+        # can't calculate exchange rate if price is 0. Try to get it another way.
+        # Causes slight errors if the BalancingMarketPrices are shifted
+        if 'PriceTry' in df.columns:
+            df['ExchangeRate'] = (df['Price'] / df['PriceTry']).replace([np.inf, -np.inf], np.nan)
+        else:
+            df['ExchangeRate'] = np.nan
+        
+        # Get the missing exchange rates from the provider at once
+        missing_exchange_rates = df['ExchangeRate'].isna().to_numpy()
+        if missing_exchange_rates.any() and self.exchange_rate_provider is not None:
+            try:
+                with profiler.span('GetData.exchange_rates'):
+                    df.loc[missing_exchange_rates, 'ExchangeRate'] = self._get_exchange_rates(df.index[missing_exchange_rates])
+            except Exception as e:
+                profiler.record_error('GetData.exchange_rates', e)
+                print(f"Error: {e}")
+        
+        # Fill the rest of na values with the previous value
+        df['ExchangeRate'] = df['ExchangeRate'].ffill().astype('float')
+        
+        df['BalancingMarketPrice'] = df['BalancingMarketPrice'] * df['ExchangeRate']
+        
+        df.drop(columns=['ExchangeRate'], inplace=True)
+        
+        return df
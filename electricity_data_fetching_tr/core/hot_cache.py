@@ -0,0 +1,224 @@
+import time
+import pytz
+import threading
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from .frame import FrameBuilder
+from .series import HourlySeries
+from ..models.base import dataset_kwargs
+from ..utils.profiling import get_profiler
+
+class _Entry:
+    """Recent hours of a dataset and when they were fetched."""
+    __slots__ = ('series', 'fetched_at')
+
+    def __init__(self, series:HourlySeries, fetched_at:float):
+        self.series = series
+        self.fetched_at = fetched_at
+
+class HotCache:
+    """Keeps the last days of the datasets in memory for low latency reads.
+    Every dataset is fetched for a rolling window of days and kept as arrays. Entries expire after ttl
+    seconds and the least recently used ones are evicted when there are more than max_entries.
+    With start(), a background thread refreshes the entries when they expire and right after the day
+    ahead prices are published.
+    """
+    def __init__(self, tz:str='Europe/Istanbul', days:int=7, ttl:float=300, max_entries:int=16,
+                 transport=None, cache=None, publication_hour:int=14, refresh_delay:float=300, float_dtype:str='float64'):
+        """
+        Initialize the HotCache class.
+
+        Args:
+            tz (str, optional): Timezone. Defaults to 'Europe/Istanbul'.
+            days (int, optional): Number of days kept before today, tomorrow is always included. Defaults to 7.
+            ttl (float, optional): Seconds after which an entry is fetched again. Defaults to 300.
+            max_entries (int, optional): Maximum number of datasets kept. Defaults to 16.
+            transport (Transport, optional): Transport used to send the requests. Defaults to the shared transport.
+            cache (ResponseCache, optional): Cache of the API responses. Defaults to None.
+            publication_hour (int, optional): Hour the day ahead prices of the next day are published. Defaults to 14.
+            refresh_delay (float, optional): Seconds after the publication hour the entries are refreshed. Defaults to 300.
+            float_dtype (str, optional): Dtype of the arrays, 'float32' halves the memory. Defaults to 'float64'.
+        """
+        if days < 1:
+            raise ValueError('days must be at least 1.')
+        if max_entries < 1:
+            raise ValueError('max_entries must be at least 1.')
+        self.tz = tz
+        self.days = days
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.transport = transport
+        self.cache = cache
+        self.publication_hour = publication_hour
+        self.refresh_delay = refresh_delay
+        self.float_dtype = float_dtype
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Only one thread fetches a dataset at a time, the others wait for its result.
+        self._fetch_locks = {}
+        self._stop = threading.Event()
+        self._thread = None
+        self.hits = 0
+        self.misses = 0
+
+    def _now(self) -> datetime:
+        """Get the current local time without the timezone."""
+        return datetime.now(pytz.timezone(self.tz)).replace(tzinfo=None)
+
+    def _dataset_kwargs(self) -> dict:
+        kwargs = {'cache': self.cache}
+        if self.transport is not None:
+            kwargs['transport'] = self.transport
+        return kwargs
+
+    def _fetch(self, dataset_class) -> _Entry:
+        """
+        Fetch the rolling window of a dataset.
+
+        Args:
+            dataset_class (type): Dataset class to fetch.
+
+        Returns:
+            _Entry: Recent hours of the dataset.
+        """
+        today = self._now().replace(hour=0, minute=0, second=0, microsecond=0)
+        start_date = today - timedelta(days=self.days)
+        end_date = today + timedelta(days=1)
+
+        tz = pytz.timezone(self.tz)
+        with get_profiler().span(f"HotCache.{dataset_class.__name__}"):
+            df = dataset_class(tz.localize(start_date).isoformat(), tz.localize(end_date).isoformat(), self.tz, **dataset_kwargs(dataset_class, self._dataset_kwargs())).get_data()
+
+        # Align the data to a regular hourly index so the hours can be located by arithmetic.
+        frame = FrameBuilder(start_date, end_date)
+        frame.add(df)
+        columns = {name: frame.column(name) for name in df.columns}
+        series = HourlySeries.from_frame(pd.DataFrame(columns, index=frame.index, copy=False), float_dtype=self.float_dtype)
+        return _Entry(series, time.monotonic())
+
+    def _get_entry(self, dataset_class) -> _Entry:
+        """Get the entry of a dataset, fetching it if it is missing or expired."""
+        with self._lock:
+            entry = self._entries.get(dataset_class)
+            if entry is not None and time.monotonic() - entry.fetched_at < self.ttl:
+                self._entries.move_to_end(dataset_class)
+                self.hits += 1
+                return entry
+            self.misses += 1
+            fetch_lock = self._fetch_locks.setdefault(dataset_class, threading.Lock())
+
+        with fetch_lock:
+            # Another thread may have fetched it while waiting.
+            with self._lock:
+                entry = self._entries.get(dataset_class)
+                if entry is not None and time.monotonic() - entry.fetched_at < self.ttl:
+                    return entry
+            entry = self._fetch(dataset_class)
+            self._store(dataset_class, entry)
+        return entry
+
+    def _store(self, dataset_class, entry:_Entry):
+        with self._lock:
+            self._entries[dataset_class] = entry
+            self._entries.move_to_end(dataset_class)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_array(self, dataset_class, column:str, start_date=None, end_date=None) -> np.ndarray:
+        """
+        Get the values of a column between the dates, both included. This is the fastest way to read.
+
+        Args:
+            dataset_class (type): Dataset class, e.g. DayAheadPrices.
+            column (str): Column of the dataset, e.g. 'Price'.
+            start_date (datetime or str, optional): First hour. Defaults to the start of the window.
+            end_date (datetime or str, optional): Last hour. Defaults to the end of the window.
+
+        Returns:
+            np.ndarray: Read-only view of the values.
+        """
+        return self._get_entry(dataset_class).series.column(column, start_date, end_date)
+
+    def get(self, dataset_class, start_date=None, end_date=None, columns:list=None) -> pd.DataFrame:
+        """
+        Get the data of a dataset between the dates, both included.
+
+        Args:
+            dataset_class (type): Dataset class, e.g. DayAheadPrices.
+            start_date (datetime or str, optional): First hour. Defaults to the start of the window.
+            end_date (datetime or str, optional): Last hour. Defaults to the end of the window.
+            columns (list, optional): Columns to return. Defaults to all the columns of the dataset.
+
+        Returns:
+            pd.DataFrame: Data with an hourly datetime index.
+        """
+        return self._get_entry(dataset_class).series.to_frame(start_date, end_date, columns)
+
+    def refresh(self, dataset_class=None):
+        """
+        Fetch the datasets again, regardless of their age.
+
+        Args:
+            dataset_class (type, optional): Dataset class to refresh. Defaults to all the cached datasets.
+        """
+        with self._lock:
+            dataset_classes = list(self._entries) if dataset_class is None else [dataset_class]
+        for dataset_class in dataset_classes:
+            try:
+                self._store(dataset_class, self._fetch(dataset_class))
+            except Exception as e:
+                # Keep serving the old data for another ttl, it is fetched again on the next refresh.
+                get_profiler().record_error('HotCache.refresh', e)
+                with self._lock:
+                    entry = self._entries.get(dataset_class)
+                    if entry is not None:
+                        entry.fetched_at = time.monotonic()
+
+    def invalidate(self):
+        """Forget all the cached datasets."""
+        with self._lock:
+            self._entries.clear()
+
+    def _seconds_until_refresh(self) -> float:
+        """Get the seconds until the next refresh: the oldest entry expires or the prices are published."""
+        now = self._now()
+        publication = now.replace(hour=self.publication_hour, minute=0, second=0, microsecond=0) + timedelta(seconds=self.refresh_delay)
+        if publication <= now:
+            publication += timedelta(days=1)
+        seconds = (publication - now).total_seconds()
+
+        with self._lock:
+            if self._entries:
+                oldest = min(entry.fetched_at for entry in self._entries.values())
+                seconds = min(seconds, oldest + self.ttl - time.monotonic())
+        return max(seconds, 0.0)
+
+    def _run(self):
+        while not self._stop.wait(self._seconds_until_refresh()):
+            self.refresh()
+
+    def start(self):
+        """Start refreshing the cached datasets in a background thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='HotCache.refresh', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,259 @@
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+from datetime import datetime, date
+
+from .calendar import CALENDAR_COLUMNS
+
+def day_hashes(df:pd.DataFrame, starts:np.ndarray, columns:list) -> list:
+    """
+    Get the content hash of every column of every day. Values are hashed as float32, so a dataset read
+    back from a file, or stored with float_dtype='float32', has the same hashes as the data that was written.
+
+    Args:
+        df (pd.DataFrame): Data with an hourly datetime index.
+        starts (np.ndarray): Position of the first row of every day.
+        columns (list): Columns to hash.
+
+    Returns:
+        list: Dict of the hashes of the columns for every day.
+    """
+    ends = np.r_[starts[1:], len(df)]
+    hashes = [{} for _ in starts]
+    for column in columns:
+        # Adding 0.0 turns -0.0 into 0.0 and np.where gives every missing value the same bits.
+        values = df[column].to_numpy(dtype='float32', na_value=np.nan) + np.float32(0.0)
+        values = np.where(np.isnan(values), np.float32(np.nan), values)
+        for day_hashes, start, end in zip(hashes, starts, ends):
+            day_hashes[column] = hashlib.blake2b(values[start:end].tobytes(), digest_size=8).hexdigest()
+    return hashes
+
+class Manifest:
+    """Sidecar file of a dataset that records every day written to it: the row it starts at, its byte offset
+    in the file if the storage has one, the number of hours, the missing hours of every column, when it
+    was fetched and the content hash of every column. Updates use it to find the days to fetch again and
+    the days whose data changed without reading the dataset.
+    """
+    version = 2
+    suffix = '.manifest.json'
+
+    def __init__(self, path:str):
+        """
+        Initialize the Manifest class.
+
+        Args:
+            path (str): Path of the manifest file.
+        """
+        self.path = path
+        self.columns = list()
+        self.last = None
+        # (day, row, rows, offset, fetched_at, missing, hashes) records in order, missing maps columns to hours
+        # and hashes maps the columns, except the calendar columns, to the hash of their values.
+        self.days = list()
+        self._positions = {}
+
+    @classmethod
+    def for_storage(cls, storage) -> 'Manifest':
+        """Get the manifest next to the dataset of a storage, loaded if it exists."""
+        manifest = cls(storage.path + cls.suffix)
+        manifest.load()
+        return manifest
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def load(self):
+        """Read the manifest file, an unreadable manifest is treated as missing."""
+        self.clear()
+        if not self.exists():
+            return
+        try:
+            with open(self.path) as f:
+                content = json.load(f)
+        except (OSError, ValueError):
+            return
+        if content.get('version') != self.version:
+            return
+        self.columns = content['columns']
+        self.last = pd.Timestamp(content['last']) if content['last'] else None
+        self.days = [tuple(record) for record in content['days']]
+        self._positions = {record[0]: index for index, record in enumerate(self.days)}
+
+    def save(self):
+        """Write the manifest file atomically."""
+        content = {
+            'version': self.version,
+            'columns': self.columns,
+            'last': self.last.isoformat() if self.last is not None else None,
+            'days': self.days,
+        }
+        with open(self.path + '_temp', 'w') as f:
+            json.dump(content, f, separators=(',', ':'))
+        os.replace(self.path + '_temp', self.path)
+
+    def clear(self):
+        self.columns = list()
+        self.last = None
+        self.days = list()
+        self._positions = {}
+
+    def remove(self):
+        self.clear()
+        if self.exists():
+            os.remove(self.path)
+
+    @property
+    def rows(self) -> int:
+        """Get the number of rows of the dataset."""
+        if not self.days:
+            return 0
+        _, row, rows, _, _, _, _ = self.days[-1]
+        return row + rows
+
+    def matches(self, storage) -> bool:
+        """Check that the manifest describes the dataset, e.g. not written by an older version or another tool."""
+        return bool(self.days) and storage.exists() and storage.last_timestamp() == self.last
+
+    def record(self, df:pd.DataFrame, offsets:np.ndarray=None, append:bool=True):
+        """
+        Record the days of data written to the dataset.
+
+        Args:
+            df (pd.DataFrame): Data with an hourly datetime index, in the order it was written.
+            offsets (np.ndarray, optional): Byte offset of every row in the file. Defaults to None.
+            append (bool, optional): The data was appended to the dataset, it replaced the dataset otherwise. Defaults to True.
+        """
+        if not append:
+            self.clear()
+        if len(df) == 0:
+            return
+        self.columns = list(df.columns)
+        fetched_at = datetime.now().isoformat(timespec='seconds')
+
+        days = df.index.values.astype('datetime64[D]')
+        starts = np.flatnonzero(np.r_[True, days[1:] != days[:-1]])
+        counts = np.diff(np.r_[starts, len(days)])
+        missing = np.add.reduceat(df.isna().to_numpy(), starts, axis=0) if df.shape[1] else np.zeros((len(starts), 0), dtype=int)
+        hashes = day_hashes(df, starts, [column for column in self.columns if column not in CALENDAR_COLUMNS])
+
+        row = self.rows
+        for index, start in enumerate(starts):
+            day = str(days[start])
+            offset = int(offsets[start]) if offsets is not None else None
+            missing_hours = {column: int(n) for column, n in zip(self.columns, missing[index]) if n}
+            rows = int(counts[index])
+            if self.days and self.days[-1][0] == day:
+                # The day was split between two writes.
+                _, day_row, day_rows, offset, _, day_missing, _ = self.days.pop()
+                for column, n in day_missing.items():
+                    missing_hours[column] = missing_hours.get(column, 0) + n
+                row, rows = day_row, day_rows + rows
+                # The rows of the first part are not known anymore, the day is treated as changed when it is compared.
+                hashes[index] = {column: None for column in hashes[index]}
+            self._positions[day] = len(self.days)
+            self.days.append((day, row, rows, offset, fetched_at, missing_hours, hashes[index]))
+            row += rows
+        self.last = df.index[-1]
+
+    def truncate(self, day:date):
+        """
+        Forget the given day and the days after it, e.g. after they are removed from the dataset.
+
+        Args:
+            day (date): First day to forget.
+        """
+        position = self.position(day)
+        for record in self.days[position:]:
+            del self._positions[record[0]]
+        del self.days[position:]
+        self.last = pd.Timestamp(self.days[-1][0]) + pd.Timedelta(hours=self.days[-1][2] - 1) if self.days else None
+
+    def _key(self, day:date) -> str:
+        if isinstance(day, datetime):
+            day = day.date()
+        return day.isoformat() if isinstance(day, date) else str(day)[:10]
+
+    def position(self, day:date) -> int:
+        """Get the position of the record of the first day on or after the given day."""
+        key = self._key(day)
+        if key in self._positions:
+            return self._positions[key]
+        return int(np.searchsorted([record[0] for record in self.days], key))
+
+    def rows_from(self, day:date) -> int:
+        """Get the number of rows from the given day to the end of the dataset."""
+        position = self.position(day)
+        if position >= len(self.days):
+            return 0
+        return self.rows - self.days[position][1]
+
+    def is_complete(self, day:date, hours_per_day:int=24) -> bool:
+        """Check that all the hours of a day are written and none of them are missing."""
+        position = self._positions.get(self._key(day))
+        if position is None:
+            return False
+        record = self.days[position]
+        return record[2] >= hours_per_day and not record[5]
+
+    def incomplete_days(self, since:date=None, hours_per_day:int=24, columns:list=None) -> list:
+        """
+        Get the days that have missing hours.
+
+        Args:
+            since (date, optional): Only check the days from this day on. Defaults to None.
+            hours_per_day (int, optional): Hours a complete day has. Defaults to 24.
+            columns (list, optional): Only check these columns. Defaults to all the columns.
+
+        Returns:
+            list: Days in the format 'YYYY-MM-DD'.
+        """
+        start = self.position(since) if since is not None else 0
+        return [
+            record[0] for record in self.days[start:]
+            if record[2] < hours_per_day or (record[5] if columns is None else any(column in record[5] for column in columns))
+        ]
+
+    def days_since(self, day:date) -> list:
+        """Get the days from the given day on in the format 'YYYY-MM-DD'."""
+        return [record[0] for record in self.days[self.position(day):]]
+
+    def changed(self, df:pd.DataFrame) -> dict:
+        """
+        Compare fetched data with the recorded hashes, e.g. to find the days that were revised.
+
+        Args:
+            df (pd.DataFrame): Data with an hourly datetime index and some of the columns of the dataset.
+
+        Returns:
+            dict: Columns whose values differ for every recorded day that changed, in the format 'YYYY-MM-DD'.
+        """
+        if len(df) == 0:
+            return {}
+        days = df.index.values.astype('datetime64[D]')
+        starts = np.flatnonzero(np.r_[True, days[1:] != days[:-1]])
+        columns = [column for column in df.columns if column not in CALENDAR_COLUMNS]
+        changed = {}
+        for start, hashes in zip(starts, day_hashes(df, starts, columns)):
+            day = str(days[start])
+            position = self._positions.get(day)
+            if position is None:
+                continue
+            recorded = self.days[position][6]
+            columns = [column for column, day_hash in hashes.items() if recorded.get(column) != day_hash]
+            if columns:
+                changed[day] = columns
+        return changed
+
+    def offset(self, day:date) -> int:
+        """Get the byte offset of the first row of a day in the file, None if it is not known."""
+        position = self._positions.get(self._key(day))
+        if position is None:
+            return None
+        return self.days[position][3]
+
+    def rebuild(self, storage):
+        """Record all the days of a dataset by reading it, e.g. for datasets written without a manifest."""
+        df = storage.read()
+        self.record(df, storage.row_offsets(), append=False)
@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta
+
+# Number of months in a window and the most days they can span.
+# Groups divide or are multiples of a year, so windows start at the same months every year.
+MONTH_GROUPS = {24: 731, 12: 366, 6: 184, 4: 123, 3: 92, 2: 62, 1: 31}
+
+class WindowPlanner:
+    """Splits a date range into the windows that are fetched in parallel and written in order.
+    Windows are sized from the range limits and the payload sizes of the dataset classes
+    and aligned to calendar months, the unit the responses are cached in.
+    """
+    def __init__(self, dataset_classes:list, target_rows:int=24 * 366, max_days:int=None):
+        """
+        Initialize the WindowPlanner class.
+
+        Args:
+            dataset_classes (list): Dataset classes that are fetched for every window.
+            target_rows (int, optional): Rows a single request should return at most, smaller requests finish
+            sooner and run in parallel. Defaults to a year of hourly rows.
+            max_days (int, optional): Overrides the number of days of a window. Defaults to None.
+        """
+        self.dataset_classes = dataset_classes
+        self.target_rows = target_rows
+        self.max_days = max_days
+    
+    def window_days(self) -> int:
+        """Get the maximum number of days of a window that every endpoint accepts and keeps under target_rows."""
+        if self.max_days is not None:
+            return self.max_days
+        return min(
+            min(dataset_class.max_request_days, self.target_rows // dataset_class.rows_per_day)
+            for dataset_class in self.dataset_classes
+        )
+    
+    def plan(self, start_date:datetime, end_date:datetime) -> list:
+        """
+        Split the date range into windows.
+        A window holds whole groups of months, groups start at the same months for every range
+        (e.g. at the start of the year for 12 months), so the same windows are requested every time.
+
+        Args:
+            start_date (datetime): Start date.
+            end_date (datetime): End date, the day is included.
+
+        Returns:
+            list: (start, end) tuples of the windows in order.
+        """
+        window_days = self.window_days()
+        # Windows shorter than a month are split by days.
+        group_months = next((months for months, days in MONTH_GROUPS.items() if days <= window_days), 0)
+        
+        windows = list()
+        window_start = start_date
+        while window_start <= end_date:
+            if group_months >= 1:
+                month_index = window_start.year * 12 + window_start.month - 1
+                next_index = (month_index // group_months + 1) * group_months
+                next_start = window_start.replace(year=next_index // 12, month=next_index % 12 + 1, day=1,
+                                                  hour=0, minute=0, second=0, microsecond=0)
+            else:
+                next_start = window_start.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=max(window_days, 1))
+            window_end = min(next_start - timedelta(days=1), end_date)
+            windows.append((window_start, window_end))
+            window_start = next_start
+        return windows
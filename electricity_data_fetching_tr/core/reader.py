@@ -0,0 +1,103 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+
+class DatasetReader:
+    """Reads a dataset written with MemmapStorage through memory-mapped files.
+    Columns are returned as views of the files, so processes reading the same dataset share the pages
+    of the operating system's cache instead of holding their own parsed copies.
+    """
+    def __init__(self, path:str):
+        """
+        Initialize the DatasetReader class.
+
+        Args:
+            path (str): Path of the dataset directory written with MemmapStorage.
+        """
+        self.path = path
+        self.reload()
+    
+    def reload(self):
+        """Map the files again, e.g. after the dataset is updated."""
+        with open(os.path.join(self.path, 'meta.json')) as f:
+            meta = json.load(f)
+        self.rows = meta['rows']
+        self.columns = list(meta['columns'])
+        self._timestamps = self._map('_index', 'int64')
+        self._columns = {column: self._map(column, dtype) for column, dtype in zip(meta['columns'], meta['dtypes'])}
+    
+    def _map(self, name:str, dtype:str) -> np.ndarray:
+        if self.rows == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(os.path.join(self.path, f"{name}.bin"), dtype=dtype, mode='r', shape=(self.rows,))
+    
+    def close(self):
+        """Release the mapped files."""
+        self._timestamps = None
+        self._columns = {}
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def __len__(self) -> int:
+        return self.rows
+    
+    @property
+    def timestamps(self) -> np.ndarray:
+        """Hourly timestamps as a read-only datetime64[ns] view."""
+        return self._timestamps.view('datetime64[ns]')
+    
+    @property
+    def index(self) -> pd.DatetimeIndex:
+        return pd.DatetimeIndex(self.timestamps, name='date')
+    
+    def locate(self, start=None, end=None) -> tuple:
+        """
+        Find the positions of the rows between the given hours with a binary search on the index.
+
+        Args:
+            start (str or datetime, optional): First hour. Defaults to the first row.
+            end (str or datetime, optional): Last hour, included. Defaults to the last row.
+
+        Returns:
+            tuple: Position of the first row and the position after the last row.
+        """
+        first = 0 if start is None else int(np.searchsorted(self._timestamps, pd.Timestamp(start).value, side='left'))
+        last = self.rows if end is None else int(np.searchsorted(self._timestamps, pd.Timestamp(end).value, side='right'))
+        return first, max(first, last)
+    
+    def column(self, name:str, start=None, end=None) -> np.ndarray:
+        """
+        Get a column between the given hours without copying it.
+
+        Args:
+            name (str): Name of the column.
+            start (str or datetime, optional): First hour. Defaults to None.
+            end (str or datetime, optional): Last hour, included. Defaults to None.
+
+        Returns:
+            np.ndarray: Read-only view of the column.
+        """
+        first, last = self.locate(start, end)
+        return self._columns[name][first:last]
+    
+    def frame(self, start=None, end=None, columns:list=None) -> pd.DataFrame:
+        """
+        Get the rows between the given hours as a DataFrame backed by the mapped files.
+
+        Args:
+            start (str or datetime, optional): First hour. Defaults to None.
+            end (str or datetime, optional): Last hour, included. Defaults to None.
+            columns (list, optional): Columns to include. Defaults to all the columns.
+
+        Returns:
+            pd.DataFrame: Data with a datetime index.
+        """
+        first, last = self.locate(start, end)
+        columns = self.columns if columns is None else columns
+        index = pd.DatetimeIndex(self.timestamps[first:last], name='date')
+        return pd.DataFrame({column: self._columns[column][first:last] for column in columns}, index=index, copy=False)
@@ -0,0 +1,191 @@
+import numpy as np
+import pandas as pd
+
+HOUR = np.timedelta64(1, 'h')
+
+# Compact dtypes of the calendar columns, 'bit' columns are packed into 8 hours per byte.
+CALENDAR_DTYPES = {
+    'Day': 'uint8',
+    'Month': 'uint8',
+    'Year': 'uint16',
+    'Hour': 'uint8',
+    'Weekday': 'uint8',
+    'Holiday': 'bit',
+    'Mod168': 'uint8',
+}
+
+class HourlySeries:
+    """Columns of a regular hourly time series in compact arrays.
+    The index is stored as the first hour and the number of hours instead of a timestamp per row. Value
+    columns are contiguous float arrays, the calendar columns are small integers and the holidays are
+    bit-packed, so a year of data takes a fraction of the memory of the DataFrame it was created from.
+    """
+    def __init__(self, start:np.datetime64, length:int, columns:dict, dtypes:dict=None, tz=None):
+        """
+        Initialize the HourlySeries class. Use from_frame to create it from a DataFrame.
+
+        Args:
+            start (np.datetime64): First hour, in UTC if tz is given.
+            length (int): Number of hours.
+            columns (dict): Arrays of the columns, bit columns are packed with np.packbits.
+            dtypes (dict, optional): Dtypes of the columns, 'bit' for the packed ones. Defaults to the dtypes of the arrays.
+            tz (optional): Timezone of the index. Defaults to None.
+        """
+        self.start = np.datetime64(start, 'h')
+        self.length = int(length)
+        self._columns = dict(columns)
+        self.dtypes = {name: str(array.dtype) for name, array in self._columns.items()}
+        self.dtypes.update(dtypes or {})
+        self.tz = tz
+        for array in self._columns.values():
+            array.flags.writeable = False
+
+    @staticmethod
+    def _compact(values:np.ndarray, dtype:str, float_dtype:str) -> tuple:
+        """Convert the values of a column to its compact dtype, columns with missing or out of range values stay floats."""
+        if dtype == 'bit':
+            if np.isin(values, (0, 1)).all():
+                return np.packbits(values.astype(bool)), 'bit'
+        elif dtype is not None:
+            info = np.iinfo(dtype)
+            if np.isfinite(values).all() and (values == np.round(values)).all() and ((values >= info.min) & (values <= info.max)).all():
+                return values.astype(dtype), dtype
+        return np.ascontiguousarray(values, dtype=float_dtype), float_dtype
+
+    @classmethod
+    def from_frame(cls, df:pd.DataFrame, float_dtype:str='float64', dtypes:dict=None) -> 'HourlySeries':
+        """
+        Create the series from a DataFrame with an hourly datetime index.
+        Missing hours become missing values, repeated hours are not supported.
+
+        Args:
+            df (pd.DataFrame): Data with an hourly datetime index, e.g. read from a dataset.
+            float_dtype (str, optional): Dtype of the value columns, 'float32' halves the memory. Defaults to 'float64'.
+            dtypes (dict, optional): Compact dtypes of the columns, integer dtypes or 'bit'. Defaults to CALENDAR_DTYPES.
+
+        Returns:
+            HourlySeries: Compact copy of the data.
+        """
+        dtypes = CALENDAR_DTYPES if dtypes is None else dtypes
+        index = pd.DatetimeIndex(df.index)
+        if len(index) == 0:
+            columns = {name: np.empty(0, dtype=float_dtype) for name in df.columns}
+            return cls(np.datetime64('1970-01-01T00', 'h'), 0, columns, tz=index.tz)
+
+        # The values of a timezone aware index are in UTC, so the hours are regular around DST changes.
+        hours = index.values.astype('datetime64[h]')
+        if (index.values != hours.astype(index.values.dtype)).any():
+            raise ValueError('Index must only contain whole hours.')
+        start = hours.min()
+        positions = ((hours - start) // HOUR).astype(np.int64)
+        length = int(positions.max()) + 1
+        regular = length == len(positions) and (np.diff(positions) == 1).all()
+        if not regular and len(np.unique(positions)) != len(positions):
+            raise ValueError('Index contains repeated hours, e.g. set dst_duplicates of the dataset classes to "first".')
+
+        columns = {}
+        kinds = {}
+        for name in df.columns:
+            values = df[name].to_numpy(dtype='float64', na_value=np.nan)
+            if not regular:
+                aligned = np.full(length, np.nan)
+                aligned[positions] = values
+                values = aligned
+            columns[name], kinds[name] = cls._compact(values, dtypes.get(name), float_dtype)
+        return cls(start, length, columns, kinds, tz=index.tz)
+
+    def __len__(self) -> int:
+        return self.length
+
+    @property
+    def columns(self) -> list:
+        return list(self._columns)
+
+    @property
+    def end(self) -> np.datetime64:
+        """Last hour, in UTC if the series has a timezone."""
+        return self.start + (self.length - 1) * HOUR
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the arrays of the columns."""
+        return sum(array.nbytes for array in self._columns.values())
+
+    def _hour(self, value) -> np.datetime64:
+        if self.tz is None and getattr(value, 'tzinfo', None) is None:
+            # Hot path of the readers, np.datetime64 parses the dates several times faster than pd.Timestamp.
+            return np.datetime64(value, 'h')
+        timestamp = pd.Timestamp(value)
+        if self.tz is not None:
+            timestamp = timestamp.tz_localize(self.tz) if timestamp.tzinfo is None else timestamp
+            timestamp = timestamp.tz_convert('UTC').tz_localize(None)
+        elif timestamp.tzinfo is not None:
+            timestamp = timestamp.tz_localize(None)
+        return np.datetime64(timestamp, 'h')
+
+    def locate(self, start=None, end=None) -> slice:
+        """
+        Get the positions of the hours between the given hours by arithmetic on the start.
+
+        Args:
+            start (str or datetime, optional): First hour. Defaults to the first hour of the series.
+            end (str or datetime, optional): Last hour, included. Defaults to the last hour of the series.
+
+        Returns:
+            slice: Positions of the hours.
+        """
+        first = 0 if start is None else (self._hour(start) - self.start) // HOUR
+        last = self.length if end is None else (self._hour(end) - self.start) // HOUR + 1
+        first = int(min(max(first, 0), self.length))
+        return slice(first, int(min(max(last, first), self.length)))
+
+    def index(self, start=None, end=None) -> pd.DatetimeIndex:
+        """Get the hourly index between the given hours, it is created from the start and the length."""
+        positions = self.locate(start, end)
+        index = pd.date_range(self.start + positions.start * HOUR, periods=positions.stop - positions.start, freq='h', name='date')
+        if self.tz is not None:
+            index = index.tz_localize('UTC').tz_convert(self.tz)
+        return index
+
+    def column(self, name:str, start=None, end=None) -> np.ndarray:
+        """
+        Get the values of a column between the given hours.
+
+        Args:
+            name (str): Name of the column.
+            start (str or datetime, optional): First hour. Defaults to None.
+            end (str or datetime, optional): Last hour, included. Defaults to None.
+
+        Returns:
+            np.ndarray: Read-only view of the column, bit columns are unpacked into a new bool array.
+        """
+        positions = self.locate(start, end)
+        array = self._columns[name]
+        if self.dtypes[name] != 'bit':
+            return array[positions]
+        # Only unpack the bytes of the requested hours.
+        first_byte = positions.start // 8
+        bits = np.unpackbits(array[first_byte:-(-positions.stop // 8)])
+        offset = positions.start - first_byte * 8
+        return bits[offset:offset + positions.stop - positions.start].astype(bool)
+
+    def to_frame(self, start=None, end=None, columns:list=None, float_dtype:str=None) -> pd.DataFrame:
+        """
+        Get the data between the given hours as a DataFrame.
+
+        Args:
+            start (str or datetime, optional): First hour. Defaults to None.
+            end (str or datetime, optional): Last hour, included. Defaults to None.
+            columns (list, optional): Columns to include. Defaults to all the columns.
+            float_dtype (str, optional): Convert all the columns to this dtype, e.g. 'float64' to get the columns
+                as they are written to the datasets. Defaults to None, the arrays are not copied and the calendar
+                columns keep their compact dtypes.
+
+        Returns:
+            pd.DataFrame: Data with an hourly datetime index.
+        """
+        columns = self.columns if columns is None else columns
+        data = {name: self.column(name, start, end) for name in columns}
+        if float_dtype is not None:
+            data = {name: values.astype(float_dtype, copy=False) for name, values in data.items()}
+        return pd.DataFrame(data, index=self.index(start, end), copy=False)
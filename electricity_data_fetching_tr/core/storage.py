@@ -0,0 +1,547 @@
+import io
+import os
+import json
+import shutil
+import numpy as np
+import pandas as pd
+
+from ..utils.timeparse import parse_datetime
+
+class Storage:
+    """Base class of the storage backends the datasets are written to and read from.
+    Updates are journaled: begin_update saves what is going to be changed, commit discards the journal
+    and recover restores the dataset if an update did not finish.
+    """
+    extension = ''
+
+    def __init__(self, path:str):
+        """
+        Initialize the Storage class.
+
+        Args:
+            path (str): Path of the dataset, including the extension.
+        """
+        self.path = path
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def write(self, df:pd.DataFrame, append:bool=False) -> np.ndarray:
+        """
+        Write the data to the dataset.
+
+        Args:
+            df (pd.DataFrame): Data with an hourly datetime index.
+            append (bool, optional): Append to the dataset instead of replacing it. Defaults to False.
+
+        Returns:
+            np.ndarray: Byte offset of every written row in the file, None if the rows have no byte offsets.
+        """
+        raise NotImplementedError
+
+    def row_offsets(self) -> np.ndarray:
+        """Get the byte offset of every row in the file, None if the rows have no byte offsets."""
+        return None
+
+    def read(self, start=None, end=None) -> pd.DataFrame:
+        """
+        Read the dataset.
+
+        Args:
+            start (str or datetime, optional): First hour to read. Defaults to None.
+            end (str or datetime, optional): Last hour to read. Defaults to None.
+
+        Returns:
+            pd.DataFrame: Data with a datetime index.
+        """
+        raise NotImplementedError
+
+    def read_tail(self, n_rows:int) -> pd.DataFrame:
+        """
+        Read the last rows of the dataset.
+
+        Args:
+            n_rows (int): Number of rows.
+
+        Returns:
+            pd.DataFrame: Data with a datetime index.
+        """
+        df = self.read()
+        return df.iloc[max(len(df) - n_rows, 0):]
+
+    def last_timestamp(self) -> pd.Timestamp:
+        """Get the last hour in the dataset."""
+        raise NotImplementedError
+
+    def begin_update(self, n_rows:int=0) -> pd.Timestamp:
+        """
+        Journal the dataset and remove its last rows.
+
+        Args:
+            n_rows (int, optional): Number of rows to remove from the end. Defaults to 0.
+
+        Returns:
+            pd.Timestamp: Last removed hour, None if no rows are removed.
+        """
+        raise NotImplementedError
+
+    def commit(self):
+        """Discard the journal of a finished update."""
+        raise NotImplementedError
+
+    def recover(self):
+        """Restore the dataset to its state before an update that did not finish."""
+        raise NotImplementedError
+
+class CSVStorage(Storage):
+    """Stores the dataset in a single CSV file. Updates only read and rewrite the end of the file."""
+    extension = '.csv'
+
+    def write(self, df:pd.DataFrame, append:bool=False) -> np.ndarray:
+        data = df.to_csv(header=not append).encode()
+        with open(self.path, 'ab' if append else 'wb') as f:
+            f.seek(0, os.SEEK_END)
+            position = f.tell()
+            f.write(data)
+        return position + self._line_starts(data, skip_header=not append)
+
+    def _line_starts(self, data:bytes, skip_header:bool) -> np.ndarray:
+        """Get the offset of every line in the given bytes."""
+        newlines = np.flatnonzero(np.frombuffer(data, dtype=np.uint8) == ord('\n'))
+        starts = np.r_[0, newlines[:-1] + 1] if len(newlines) else np.zeros(0, dtype=np.int64)
+        return starts[1:] if skip_header else starts
+
+    def row_offsets(self) -> np.ndarray:
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        if data and not data.endswith(b'\n'):
+            data += b'\n'
+        return self._line_starts(data, skip_header=True)
+
+    def read(self, start=None, end=None) -> pd.DataFrame:
+        df = pd.read_csv(self.path, index_col=0, parse_dates=[0])
+        return df.loc[start:end]
+
+    def _find_line_offset(self, n_lines:int, block_size:int=1 << 16) -> int:
+        """
+        Find the byte offset of the n-th line from the end of the CSV file by reading it backwards in blocks.
+        The header line is never included.
+
+        Args:
+            n_lines (int): Number of lines from the end.
+            block_size (int, optional): Number of bytes read at once. Defaults to 65536.
+
+        Returns:
+            int: Byte offset where the n-th line from the end starts.
+        """
+        with open(self.path, 'rb') as f:
+            header_end = len(f.readline())
+            f.seek(0, os.SEEK_END)
+            position = f.tell()
+            # Ignore the newline at the end of the file
+            if position > header_end:
+                f.seek(position - 1)
+                if f.read(1) == b'\n':
+                    position -= 1
+
+            newlines = 0
+            while position > header_end:
+                read_size = min(block_size, position - header_end)
+                position -= read_size
+                f.seek(position)
+                block = f.read(read_size)
+                end = len(block)
+                while True:
+                    newline = block.rfind(b'\n', 0, end)
+                    if newline == -1:
+                        break
+                    newlines += 1
+                    if newlines == n_lines:
+                        return position + newline + 1
+                    end = newline
+        return header_end
+
+    def read_tail(self, n_rows:int) -> pd.DataFrame:
+        # Only the header and the last lines are parsed.
+        with open(self.path, 'rb') as f:
+            header = f.readline()
+            f.seek(self._find_line_offset(n_rows))
+            tail = f.read()
+        return pd.read_csv(io.BytesIO(header + tail), index_col=0, parse_dates=[0])
+
+    def read_last_row(self) -> list:
+        # Efficiently read the last row of the CSV file
+        with open(self.path, 'rb') as f:
+            f.seek(self._find_line_offset(1))
+            return f.readline().decode().strip().split(',')
+
+    def last_timestamp(self) -> pd.Timestamp:
+        return pd.Timestamp(parse_datetime(self.read_last_row()[0]))
+
+    def _journal_path(self) -> str:
+        return self.path + '.journal'
+
+    def begin_update(self, n_rows:int=0) -> pd.Timestamp:
+        # The removed lines are saved to the journal first, with 0 rows only the current size of the file is journaled.
+        offset = self._find_line_offset(n_rows) if n_rows > 0 else os.path.getsize(self.path)
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            tail = f.read()
+
+        # Write the journal atomically, a partially written journal must never be used.
+        journal_path = self._journal_path()
+        with open(journal_path + '_temp', 'wb') as journal:
+            journal.write(f"{offset}\n".encode())
+            journal.write(tail)
+            journal.flush()
+            os.fsync(journal.fileno())
+        os.replace(journal_path + '_temp', journal_path)
+
+        with open(self.path, 'r+b') as f:
+            f.truncate(offset)
+            f.flush()
+            os.fsync(f.fileno())
+
+        if not tail.strip():
+            return None
+        last_line = tail.decode().strip().split('\n')[-1]
+        return pd.Timestamp(parse_datetime(last_line.split(',')[0]))
+
+    def commit(self):
+        if os.path.exists(self._journal_path()):
+            os.remove(self._journal_path())
+
+    def recover(self):
+        journal_path = self._journal_path()
+        if not os.path.exists(journal_path):
+            return
+        with open(journal_path, 'rb') as journal:
+            offset = int(journal.readline())
+            tail = journal.read()
+        with open(self.path, 'r+b') as f:
+            f.truncate(offset)
+            f.seek(offset)
+            f.write(tail)
+            f.flush()
+            os.fsync(f.fileno())
+        os.remove(journal_path)
+
+class PartitionedStorage(Storage):
+    """Stores the dataset in a directory with one columnar file per year or month.
+    Columns are stored with a fixed float type and the hourly datetime index.
+    Appending only rewrites the partitions the new rows fall in.
+    """
+    partition_formats = {'year': '%Y', 'month': '%Y-%m'}
+
+    def __init__(self, path:str, partition_by:str='month', float_dtype:str='float64'):
+        """
+        Initialize the PartitionedStorage class.
+
+        Args:
+            path (str): Path of the dataset directory, including the extension.
+            partition_by (str, optional): 'year' or 'month'. Defaults to 'month'.
+            float_dtype (str, optional): Type the columns are stored with, 'float32' or 'float64'. Defaults to 'float64'.
+        """
+        if partition_by not in self.partition_formats:
+            raise ValueError(f"partition_by must be one of {list(self.partition_formats)}.")
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError as e:
+            raise ImportError(f"{type(self).__name__} requires pyarrow, install it with 'pip install electricity_data_fetching_tr[parquet]'.") from e
+
+        super().__init__(path)
+        self.partition_by = partition_by
+        self.float_dtype = float_dtype
+
+    def _write_file(self, df:pd.DataFrame, path:str):
+        raise NotImplementedError
+
+    def _read_file(self, path:str) -> pd.DataFrame:
+        raise NotImplementedError
+
+    def _partition_path(self, key:str) -> str:
+        return os.path.join(self.path, f"{key}{self.file_extension}")
+
+    def _partitions(self) -> list:
+        """Get the keys of the stored partitions in order."""
+        if not os.path.isdir(self.path):
+            return list()
+        return sorted(
+            file_name[:-len(self.file_extension)] for file_name in os.listdir(self.path)
+            if file_name.endswith(self.file_extension)
+        )
+
+    def _prepare(self, df:pd.DataFrame) -> pd.DataFrame:
+        df = df.astype(self.float_dtype)
+        df.index = pd.DatetimeIndex(df.index, name='date')
+        return df
+
+    def _replace_file(self, df:pd.DataFrame, path:str):
+        # Write next to the partition and rename, a partition is never partially written.
+        temp_path = path + '_temp'
+        self._write_file(df, temp_path)
+        os.replace(temp_path, path)
+
+    def write(self, df:pd.DataFrame, append:bool=False):
+        if not append and os.path.isdir(self.path):
+            for key in self._partitions():
+                os.remove(self._partition_path(key))
+        os.makedirs(self.path, exist_ok=True)
+
+        df = self._prepare(df)
+        keys = df.index.strftime(self.partition_formats[self.partition_by])
+        for key, partition in df.groupby(keys, sort=True):
+            path = self._partition_path(key)
+            if os.path.exists(path):
+                partition = pd.concat([self._read_file(path), partition])
+                partition = partition[~partition.index.duplicated(keep='last')]
+            self._replace_file(partition, path)
+
+    def read(self, start=None, end=None) -> pd.DataFrame:
+        partition_format = self.partition_formats[self.partition_by]
+        keys = self._partitions()
+        if start is not None:
+            keys = [key for key in keys if key >= pd.Timestamp(start).strftime(partition_format)]
+        if end is not None:
+            keys = [key for key in keys if key <= pd.Timestamp(end).strftime(partition_format)]
+        if not keys:
+            return pd.DataFrame()
+        df = pd.concat([self._read_file(self._partition_path(key)) for key in keys])
+        return df.loc[start:end]
+
+    def read_tail(self, n_rows:int) -> pd.DataFrame:
+        # Only the last partitions that contain the rows are read.
+        frames = list()
+        rows = 0
+        for key in reversed(self._partitions()):
+            if rows >= n_rows:
+                break
+            frames.append(self._read_file(self._partition_path(key)))
+            rows += len(frames[-1])
+        if not frames:
+            return pd.DataFrame()
+        df = pd.concat(frames[::-1])
+        return df.iloc[max(len(df) - n_rows, 0):]
+
+    def last_timestamp(self) -> pd.Timestamp:
+        keys = self._partitions()
+        if not keys:
+            return None
+        return self._read_file(self._partition_path(keys[-1])).index[-1]
+
+    def _journal_path(self) -> str:
+        return os.path.join(self.path, '_journal')
+
+    def begin_update(self, n_rows:int=0) -> pd.Timestamp:
+        journal_path = self._journal_path()
+        os.makedirs(journal_path + '_temp', exist_ok=True)
+
+        # Copy the partitions that lose rows and the last partition, appended rows are merged into it.
+        # Partitions created by the update are removed when recovering.
+        keys = self._partitions()
+        last_removed = None
+        changed = dict()
+        remaining = n_rows
+        for index, key in enumerate(reversed(keys)):
+            if remaining <= 0 and index > 0:
+                break
+            path = self._partition_path(key)
+            shutil.copy2(path, os.path.join(journal_path + '_temp', os.path.basename(path)))
+            if remaining > 0:
+                df = self._read_file(path)
+                if last_removed is None and len(df) > 0:
+                    last_removed = df.index[-1]
+                changed[key] = df.iloc[:max(len(df) - remaining, 0)]
+                remaining -= len(df)
+        with open(os.path.join(journal_path + '_temp', 'partitions.json'), 'w') as f:
+            json.dump(keys, f)
+        os.replace(journal_path + '_temp', journal_path)
+
+        for key, df in changed.items():
+            if len(df) > 0:
+                self._replace_file(df, self._partition_path(key))
+            else:
+                os.remove(self._partition_path(key))
+        return last_removed
+
+    def commit(self):
+        if os.path.exists(self._journal_path()):
+            shutil.rmtree(self._journal_path())
+
+    def recover(self):
+        journal_path = self._journal_path()
+        if not os.path.exists(journal_path):
+            return
+        with open(os.path.join(journal_path, 'partitions.json')) as f:
+            keys = json.load(f)
+        for key in self._partitions():
+            if key not in keys:
+                os.remove(self._partition_path(key))
+        for file_name in os.listdir(journal_path):
+            if file_name.endswith(self.file_extension):
+                os.replace(os.path.join(journal_path, file_name), os.path.join(self.path, file_name))
+        shutil.rmtree(journal_path)
+
+class ParquetStorage(PartitionedStorage):
+    """Stores the dataset as partitioned Parquet files."""
+    extension = '.parquet'
+    file_extension = '.parquet'
+
+    def _write_file(self, df:pd.DataFrame, path:str):
+        df.to_parquet(path, engine='pyarrow')
+
+    def _read_file(self, path:str) -> pd.DataFrame:
+        return pd.read_parquet(path, engine='pyarrow')
+
+class FeatherStorage(PartitionedStorage):
+    """Stores the dataset as partitioned Arrow IPC (Feather) files."""
+    extension = '.arrow'
+    file_extension = '.feather'
+
+    def _write_file(self, df:pd.DataFrame, path:str):
+        df.reset_index().to_feather(path)
+
+    def _read_file(self, path:str) -> pd.DataFrame:
+        return pd.read_feather(path).set_index('date')
+
+class MemmapStorage(Storage):
+    """Stores the dataset in a directory with one raw binary file per column and one for the index,
+    so it can be memory-mapped by DatasetReader without parsing or copying.
+    The number of rows in meta.json is written last, rows after it are ignored until they are committed.
+    """
+    extension = '.mmap'
+
+    def __init__(self, path:str, float_dtype:str='float64'):
+        """
+        Initialize the MemmapStorage class.
+
+        Args:
+            path (str): Path of the dataset directory, including the extension.
+            float_dtype (str, optional): Type the columns are stored with, 'float32' or 'float64'. Defaults to 'float64'.
+        """
+        super().__init__(path)
+        self.float_dtype = float_dtype
+
+    def _meta_path(self) -> str:
+        return os.path.join(self.path, 'meta.json')
+
+    def _column_path(self, column:str) -> str:
+        return os.path.join(self.path, f"{column}.bin")
+
+    def _index_path(self) -> str:
+        return os.path.join(self.path, '_index.bin')
+
+    def read_meta(self) -> dict:
+        """Get the columns, their types and the number of rows of the dataset."""
+        if not os.path.exists(self._meta_path()):
+            return None
+        with open(self._meta_path()) as f:
+            return json.load(f)
+
+    def _write_meta(self, meta:dict):
+        with open(self._meta_path() + '_temp', 'w') as f:
+            json.dump(meta, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(self._meta_path() + '_temp', self._meta_path())
+
+    def _files(self, meta:dict) -> list:
+        """Get the path and the type of the index file and every column file."""
+        return [(self._index_path(), 'int64')] + [
+            (self._column_path(column), dtype) for column, dtype in zip(meta['columns'], meta['dtypes'])
+        ]
+
+    def write(self, df:pd.DataFrame, append:bool=False):
+        meta = self.read_meta() if append else None
+        if meta is None:
+            if os.path.isdir(self.path):
+                shutil.rmtree(self.path)
+            os.makedirs(self.path)
+            meta = {'columns': list(df.columns), 'dtypes': [self.float_dtype] * len(df.columns), 'rows': 0}
+
+        df = df.reindex(columns=meta['columns'])
+        arrays = [pd.DatetimeIndex(df.index).values.astype('datetime64[ns]').view('int64')] + [
+            df[column].to_numpy(dtype=dtype) for column, dtype in zip(meta['columns'], meta['dtypes'])
+        ]
+        for (path, dtype), array in zip(self._files(meta), arrays):
+            with open(path, 'ab') as f:
+                # Drop the rows that were not committed
+                f.truncate(meta['rows'] * np.dtype(dtype).itemsize)
+                f.seek(0, os.SEEK_END)
+                f.write(np.ascontiguousarray(array).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+        meta['rows'] += len(df)
+        self._write_meta(meta)
+
+    def read(self, start=None, end=None) -> pd.DataFrame:
+        from .reader import DatasetReader
+        with DatasetReader(self.path) as reader:
+            return reader.frame(start, end).copy()
+
+    def read_tail(self, n_rows:int) -> pd.DataFrame:
+        from .reader import DatasetReader
+        with DatasetReader(self.path) as reader:
+            return reader.frame().iloc[max(len(reader) - n_rows, 0):].copy()
+
+    def last_timestamp(self) -> pd.Timestamp:
+        meta = self.read_meta()
+        if meta is None or meta['rows'] == 0:
+            return None
+        index = np.memmap(self._index_path(), dtype='int64', mode='r', shape=(meta['rows'],))
+        return pd.Timestamp(int(index[-1]))
+
+    def _journal_path(self) -> str:
+        return os.path.join(self.path, '_journal')
+
+    def begin_update(self, n_rows:int=0) -> pd.Timestamp:
+        meta = self.read_meta()
+        n_rows = min(n_rows, meta['rows'])
+        rows = meta['rows'] - n_rows
+
+        # Save the removed rows of every file and the current meta, appending overwrites them.
+        journal_path = self._journal_path()
+        os.makedirs(journal_path + '_temp', exist_ok=True)
+        for path, dtype in self._files(meta):
+            with open(path, 'rb') as f:
+                f.seek(rows * np.dtype(dtype).itemsize)
+                tail = f.read(n_rows * np.dtype(dtype).itemsize)
+            with open(os.path.join(journal_path + '_temp', os.path.basename(path)), 'wb') as f:
+                f.write(tail)
+        with open(os.path.join(journal_path + '_temp', 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+        os.replace(journal_path + '_temp', journal_path)
+
+        last_removed = self.last_timestamp() if n_rows > 0 else None
+        self._write_meta(dict(meta, rows=rows))
+        return last_removed
+
+    def commit(self):
+        if os.path.exists(self._journal_path()):
+            shutil.rmtree(self._journal_path())
+
+    def recover(self):
+        journal_path = self._journal_path()
+        if not os.path.exists(journal_path):
+            return
+        with open(os.path.join(journal_path, 'meta.json')) as f:
+            meta = json.load(f)
+        for path, dtype in self._files(meta):
+            with open(os.path.join(journal_path, os.path.basename(path)), 'rb') as f:
+                tail = f.read()
+            with open(path, 'r+b') as f:
+                f.truncate((meta['rows'] * np.dtype(dtype).itemsize) - len(tail))
+                f.seek(0, os.SEEK_END)
+                f.write(tail)
+                f.flush()
+                os.fsync(f.fileno())
+        self._write_meta(meta)
+        shutil.rmtree(journal_path)
+
+STORAGE_CLASSES = {
+    'csv': CSVStorage,
+    'parquet': ParquetStorage,
+    'feather': FeatherStorage,
+    'mmap': MemmapStorage,
+}
@@ -1,11 +1,16 @@
 from .get_data import GetData
 from .constants import DATASETS_DIRECTORY
+from .manifest import Manifest
+from .features import FeatureEngine
+from ..utils.profiling import get_profiler
 
 import os
+import numpy as np
+import pandas as pd
 from datetime import datetime, timedelta
 
 class UpdateData(GetData):
-    def __init__(self, csv_name:str, dataset_classes:list=None, tz:str='Europe/Istanbul', dataset_dir=None):
+    def __init__(self, csv_name:str, dataset_classes:list=None, tz:str='Europe/Istanbul', dataset_dir=None, refetch_days:int=3, **kwargs):
         """
         Initialize the UpdateData class.
         
@@ -15,30 +20,46 @@ class UpdateData(GetData):
             Defaults to DATASET_CLASSES.
             tz (str, optional): Timezone. Defaults to 'Europe/Istanbul'.
             dataset_dir (str, optional): Directory to save the datasets. Defaults to None.
+            refetch_days (int, optional): With replace_last_day, days with missing hours are fetched again
+            if they are at most this many days before the last day. Defaults to 3.
+            **kwargs: Passed to GetData, e.g. max_workers, transport or cache.
         """
         
         
-        super().__init__(dataset_classes, tz, dataset_dir)
-        self.csv_path = f'{self.dataset_dir}/{csv_name}.csv'
+        super().__init__(dataset_classes, tz, dataset_dir, **kwargs)
+        self.csv_path = f'{self.dataset_dir}/{csv_name}{self.storage_class.extension}'
+        self.storage = self._open_storage(self.csv_path)
+        self.refetch_days = refetch_days
 
+    def _load_manifest(self) -> Manifest:
+        """
+        Get the manifest of the dataset. It is rebuilt from the dataset if it is missing or out of date.
+
+        Returns:
+            Manifest: Manifest of the dataset, None if manifests are disabled.
+        """
+        if not self.use_manifest:
+            return None
+        manifest = Manifest.for_storage(self.storage)
+        if not manifest.matches(self.storage):
+            manifest.rebuild(self.storage)
+        return manifest
+
+    def _prepare_features(self, start_date:datetime=None):
+        """
+        Load the state of the features. It is rebuilt from the dataset if it is missing, does not end with
+        the dataset or does not reach back far enough to compute the features from start_date on.
 
-    def _read_last_row(self):
-        # Efficiently read the last row of the CSV file
-        with open(self.csv_path, 'rb') as f:
-            f.seek(0, os.SEEK_END)
-            end_byte = f.tell()
-            while f.tell() > 0:
-                f.seek(-2, os.SEEK_CUR)
-                if f.read(1) == b'\n':
-                    if f.tell() == end_byte - 1:
-                        end_byte = f.tell() - 1
-                        f.seek(-1, os.SEEK_CUR)
-                        continue
-                    else:
-                        last_line = f.readline().decode()
-                        return last_line.strip().split(',')
-            f.seek(0)
-            return f.readline().decode().strip().split(',')
+        Args:
+            start_date (datetime, optional): First hour that will be written. Defaults to None.
+        """
+        if self.features is None:
+            return
+        loaded = self.features.load(FeatureEngine.path_for_storage(self.storage))
+        if (not loaded or self.features.state.end != np.datetime64(self._get_last_date(), 'h')
+                or (start_date is not None and not self.features.covers(start_date))):
+            n_rows = self.manifest.rows_from(start_date) + self.features.history if start_date is not None and self.manifest is not None else None
+            self.features.rebuild(self.storage, n_rows)
 
     def _get_last_date(self):
         """
@@ -47,7 +68,9 @@ class UpdateData(GetData):
         Returns:
             datetime: Last date of the dataset.
         """
-        return self._parse_datetime(self._read_last_row()[0])
+        if self.manifest is not None and self.manifest.last is not None:
+            return self.manifest.last.to_pydatetime()
+        return self.storage.last_timestamp().to_pydatetime()
     
     def _today_date_str(self):
         """
@@ -65,45 +88,58 @@ class UpdateData(GetData):
         Args:
             new_end_date (datetime): New end date.
         """
+        extension = self.storage_class.extension
         file_name = self.csv_path.split('/')[-1]
         file_name = file_name.split('.')[0]
         file_name = file_name.split('_')
         file_name[-1] = new_end_date.strftime('%Y-%m-%d')
         file_name = '_'.join(file_name)
         try:
-            os.rename(self.csv_path, f'{self.dataset_dir}/{file_name}.csv')
+            os.rename(self.csv_path, f'{self.dataset_dir}/{file_name}{extension}')
         except OSError as e:
             print(f"Error: {e.strerror}")
-        self.csv_path = f'{self.dataset_dir}/{file_name}.csv'
+        self.csv_path = f'{self.dataset_dir}/{file_name}{extension}'
+        self.storage = self._open_storage(self.csv_path)
     
     def get_data(self, replace_last_day:bool=False):
         """
         Update the dataset with the most recent data.
         Gets the data starting from the last date of the csv file to today's date.
+        Only the end of the dataset is read and rewritten, the new rows are appended.
+        With replace_last_day, the recent days that have missing hours or may be revised are fetched again
+        for the datasets they concern, and only the days that changed are rewritten, see refetch.
+        Without a manifest, the last day is removed and fetched again for all the datasets.
         """
+        # Restore the dataset if the previous update was interrupted
+        self.storage.recover()
+        self.manifest = self._load_manifest()
+        empty = self.manifest.last is None if self.manifest is not None else len(self.storage.read_tail(1)) == 0
+        if empty:
+            # There is no last day to continue from.
+            raise ValueError(f"The dataset {self.csv_path} is empty, create it with GetData.get_data first.")
+        
+        # Try to get tomorrow's values to be able to forecast tomorrow
+        end_date = datetime.now() + timedelta(days=1)
         
-        if not replace_last_day:
+        if self.manifest is not None:
+            # The manifest tells where the dataset ends, the dataset is not read.
+            start_date = self.manifest.last.to_pydatetime().replace(hour=0) + timedelta(days=1)
+            if start_date.date() > end_date.date():
+                # Every day up to tomorrow is written.
+                if replace_last_day:
+                    self.refetch()
+                return
+            self._prepare_features(start_date)
+            self.storage.begin_update()
+        elif not replace_last_day:
             # Get the last date of the dataset and add one day to it to start from the next day.
             start_date = self._get_last_date() + timedelta(days=1)
+            self._prepare_features()
+            self.storage.begin_update()
         else:
             # Remove the last day's data and get the data starting from the last date of the dataset.
-            temp_path = self.csv_path + '_temp'
-            with open(self.csv_path, 'r') as file, open(temp_path, 'w') as temp_file:
-                lines = file.readlines()
-                # Write all but the last 24 lines to the temp file
-                temp_file.writelines(lines[:-24])
-
-            # Replace the original file with the updated temporary file
-            os.remove(self.csv_path)
-            os.rename(temp_path, self.csv_path)
-            
-            start_date = self._parse_datetime(lines[-1].split(',')[0])
-
-            # Free the memory used
-            del lines
-
-        # Try to get tomorrow's values to be able to forecast tomorrow
-        end_date = datetime.now() + timedelta(days=1)
+            self._prepare_features()
+            start_date = self.storage.begin_update(24).to_pydatetime()
         
         # Set hour values to 0
         start_date = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
@@ -112,6 +148,143 @@ class UpdateData(GetData):
         start_date_str = self._convert_datetime_str(start_date)
         end_date_str = self._convert_datetime_str(end_date)
         
-        super().get_data(start_date_str, end_date_str, self.csv_path)
+        try:
+            super().get_data(start_date_str, end_date_str, csv_to_update=self.csv_path)
+        except BaseException:
+            self.storage.recover()
+            self.manifest = None
+            raise
+        
+        # The update is complete, the removed rows are not needed anymore.
+        self.storage.commit()
+        
+        if replace_last_day and self.manifest is not None:
+            # The new days were just fetched, only the days before them are checked.
+            self.refetch(before=start_date)
+    
+    def _refetch_days(self, dataset_class, before:datetime=None) -> list:
+        """
+        Get the days of a dataset to fetch again: the recent days with missing hours in its columns and the
+        days that may still be revised.
+
+        Args:
+            dataset_class (type): Dataset class.
+            before (datetime, optional): Only the days before this day are returned. Defaults to None.
+
+        Returns:
+            list: Days in the format 'YYYY-MM-DD'.
+        """
+        columns = [column for column in dataset_class.columns if column != 'PriceTry']
+        since = self.manifest.last.to_pydatetime() - timedelta(days=self.refetch_days)
+        days = set(self.manifest.incomplete_days(since, columns=columns))
+        if dataset_class.revision_days:
+            days.update(self.manifest.days_since(datetime.now() - timedelta(days=dataset_class.revision_days)))
+        if before is not None:
+            days = {day for day in days if day < before.date().isoformat()}
+        return sorted(days)
+    
+    def refetch(self, select=None, before:datetime=None) -> dict:
+        """
+        Fetch the recent days that are incomplete or may be revised again, dataset by dataset, and patch the
+        days whose values changed. The fetched values are compared with the hashes in the manifest, so the
+        dataset is only read and rewritten when a value changed, and only from the first changed day on.
+
+        Args:
+            select (callable, optional): Called with a dataset class and its days, the dataset is only fetched
+            if it returns True, e.g. to wait for the publication of the data. Defaults to None.
+            before (datetime, optional): Only the days before this day are fetched. Defaults to None.
+
+        Returns:
+            dict: Number of changed days of every selected dataset class.
+        """
+        if not self.use_manifest:
+            raise ValueError('refetch needs the manifest of the dataset.')
+        self.storage.recover()
+        self.manifest = self._load_manifest()
+        
+        # The days and datasets of all the due dataset classes are fetched together, e.g. the day ahead prices
+        # are needed to convert the balancing market prices and both are fetched once.
+        selected = []
+        days = set()
+        needed = set()
+        for dataset_class in self.dataset_classes:
+            class_days = self._refetch_days(dataset_class, before)
+            if not class_days or (select is not None and not select(dataset_class, class_days)):
+                continue
+            columns = [column for column in dataset_class.columns if column != 'PriceTry']
+            selected.append(dataset_class)
+            days.update(class_days)
+            # BalancingMarketPrice is converted with the exchange rate of the day ahead prices, they are fetched
+            # together so the conversion is the same as in the dataset.
+            needed.update(self._select_dataset_classes(columns))
+            if 'Price' in columns:
+                needed.update(other for other in self.dataset_classes if 'BalancingMarketPrice' in other.columns)
+        if not selected:
+            return {}
+        
+        dataset_classes = [dataset_class for dataset_class in self.dataset_classes if dataset_class in needed]
+        days = sorted(days)
+        with get_profiler().span('UpdateData.refetch'):
+            frames = list(self._iter_windows(datetime.fromisoformat(days[0]), datetime.fromisoformat(days[-1]), dataset_classes))
+            columns = [column for dataset_class in dataset_classes for column in dataset_class.columns if column != 'PriceTry']
+            df = pd.concat(frames)[columns]
+            df = df.loc[df.index.normalize().isin(pd.DatetimeIndex(days))]
+            changed = self.manifest.changed(df)
+            if changed:
+                # Only the changed columns of the changed days are written, the other values are left as they are.
+                patch = pd.DataFrame(np.nan, index=df.index, columns=df.columns)
+                for day, day_columns in changed.items():
+                    rows = df.index.normalize() == pd.Timestamp(day)
+                    patch.loc[rows, day_columns] = df.loc[rows, day_columns]
+                self.patch(patch.dropna(how='all'))
+        
+        return {
+            dataset_class.__name__: sum(1 for day_columns in changed.values() if set(day_columns).intersection(dataset_class.columns))
+            for dataset_class in selected
+        }
+    
+    def patch(self, df:pd.DataFrame):
+        """
+        Replace the values of hours that are already in the dataset, e.g. the day ahead prices published
+        after the last update. Only the rows from the first patched day on are rewritten, under the same
+        journal as the updates, and their features are computed again. Missing values in df do not replace
+        the stored values.
+
+        Args:
+            df (pd.DataFrame): Data with an hourly datetime index and some of the columns of the dataset.
+        """
+        if len(df) == 0:
+            return
+        self.storage.recover()
+        self.manifest = manifest = self._load_manifest()
+        first_day = df.index[0].normalize()
+        
+        if manifest is not None:
+            tail = self.storage.read_tail(manifest.rows_from(first_day))
+        else:
+            tail = self.storage.read(start=first_day)
+        if len(tail) == 0:
+            return
+        tail.update(df[df.columns.intersection(tail.columns)])
+        if self.features is not None:
+            self._prepare_features(tail.index[0].to_pydatetime())
+            features = self.features.update(tail)
+            for name in features.columns:
+                tail[name] = features[name].to_numpy()
+        
+        self.storage.begin_update(len(tail))
+        try:
+            offsets = self.storage.write(tail, append=True)
+        except BaseException:
+            self.storage.recover()
+            raise
+        self.storage.commit()
+        
+        if manifest is not None:
+            manifest.truncate(first_day)
+            manifest.record(tail, offsets)
+            manifest.save()
+        if self.features is not None:
+            self.features.save(FeatureEngine.path_for_storage(self.storage))
         
         # self._update_file_name(end_date)
@@ -1,16 +1,55 @@
 import json
-import requests
+import inspect
+import numpy as np
 import pandas as pd
-from datetime import timedelta
-from dateutil import parser
+from datetime import datetime, timedelta
+
+from ..utils.cache import month_chunks
+from ..utils.profiling import get_profiler
+from ..utils.timeparse import parse_datetime, to_local_index, resolve_duplicates
+from ..utils.transport import get_default_transport, endpoint_name
+
+def dataset_kwargs(dataset_class, kwargs:dict) -> dict:
+    """
+    Get the keyword arguments the constructor of a dataset class accepts, e.g. the transport and the cache
+    are not passed to datasets written with the (start_date, end_date, tz) signature.
+
+    Args:
+        dataset_class (type): Dataset class.
+        kwargs (dict): Keyword arguments shared by all the dataset classes.
+
+    Returns:
+        dict: Keyword arguments to pass to the dataset class.
+    """
+    parameters = inspect.signature(dataset_class).parameters.values()
+    if any(parameter.kind is inspect.Parameter.VAR_KEYWORD for parameter in parameters):
+        return dict(kwargs)
+    names = {parameter.name for parameter in parameters}
+    return {name: value for name, value in kwargs.items() if name in names}
 
 class Data:
-    def __init__(self, url:str, start_date:str, end_date:str, keys:list, tz:str='Europe/Istanbul'):
+    # The API accepts requests for 3 years at most.
+    max_request_days = 3 * 365
+    # Hourly data
+    rows_per_day = 24
+    # How the hours repeated when the clocks were set back are resolved, see resolve_duplicates.
+    dst_duplicates = 'first'
+    # Columns of the frame returned by get_data.
+    columns = []
+    # Hour the data of the next day is published, None if it is published throughout the day.
+    publication_hour = None
+    # Days before today whose published values may still be revised, they are fetched again by UpdateData.refetch.
+    revision_days = 0
+    
+    def __init__(self, url:str, start_date:str, end_date:str, keys:list, tz:str='Europe/Istanbul', transport=None, cache=None):
         self.url = url
         self.start_date = start_date
         self.end_date = end_date
         self.keys = keys
         self.tz = tz
+        # Connections are pooled in the transport, share it between the instances.
+        self.transport = transport if transport is not None else get_default_transport()
+        self.cache = cache
         
     def _send_request(self, url:str, body:dict=None, headers:dict=None, method:str='GET'):
         """
@@ -33,9 +72,7 @@ class Data:
                 headers['Content-Type'] = 'application/json'
         else: body = None
         
-        response = requests.request(method, url, headers=headers, data=body)
-
-        return response.json()
+        return self.transport.request(method, url, headers=headers, data=body)
     
     def _get_start_end_dates(self, start_date:str, end_date:str, lag_hours:int=0):
         """Get the start and end dates with lag hours added to the dates.
@@ -48,8 +85,8 @@ class Data:
             lag_hours (int, optional): number of hours to subtract from the dates. Defaults to 0.
         """
         
-        start_date_dt = parser.parse(start_date) - timedelta(hours=lag_hours)
-        end_date_dt = parser.parse(end_date) - timedelta(hours=lag_hours)
+        start_date_dt = parse_datetime(start_date) - timedelta(hours=lag_hours)
+        end_date_dt = parse_datetime(end_date) - timedelta(hours=lag_hours)
         
         new_start_date = start_date_dt.isoformat()
         new_end_date = end_date_dt.isoformat()
@@ -57,47 +94,160 @@ class Data:
         return start_date_dt, new_start_date, end_date_dt, new_end_date
         
     
-    def get_data(self, extra_params=None, lag_hours:int=0):
-        if extra_params is None:
-            extra_params = {}
-        
-        start_date_new_dt, start_date_new_str, end_date_new_dt, end_date_new_str = self._get_start_end_dates(self.start_date, self.end_date, lag_hours)
-        
-        body = {'startDate': start_date_new_str, 'endDate': end_date_new_str}
+    def _request_items(self, start_date:str, end_date:str, extra_params:dict) -> list:
+        """
+        Request the items of the dataset between the given dates.
+
+        Args:
+            start_date (str): Start date in ISO 8601 format.
+            end_date (str): End date in ISO 8601 format.
+            extra_params (dict): Extra parameters sent with the request.
+
+        Returns:
+            list: Items of the response.
+        """
+        body = {'startDate': start_date, 'endDate': end_date}
         for param in extra_params:
             body[param] = extra_params[param]
         
         response = self._send_request(url=self.url, body=body, method='POST')
-        df = pd.DataFrame(response['items'], columns=self.keys)
+        return response['items']
+    
+    def _get_cached_items(self, start_date_dt:datetime, end_date_dt:datetime, extra_params:dict) -> list:
+        """
+        Get the items between the given dates, only the months that are not cached or still mutable are requested.
+        Consecutive missing months are requested together. The first and last months of the range are cached
+        under their requested days if they are only partly requested, so the same range is not requested again.
+
+        Args:
+            start_date_dt (datetime): Start date.
+            end_date_dt (datetime): End date.
+            extra_params (dict): Extra parameters sent with the request.
+
+        Returns:
+            list: Items between the given dates.
+        """
+        first_day = start_date_dt.date()
+        last_day = end_date_dt.date()
+        chunks = month_chunks(first_day, last_day)
         
-        # Localize the time
-        df['date'] = pd.to_datetime(df['date'], utc=True)
-        df['date'] = df['date'].dt.tz_convert(self.tz)
-        df['date'] = df['date'].dt.tz_localize(None)
+        chunk_items = {}
+        missing_runs = list()
+        def partial_key(chunk_first_day, chunk_last_day) -> str:
+            return f"{max(chunk_first_day, first_day).isoformat()}_{min(chunk_last_day, last_day).isoformat()}"
         
-        df['date'] = df['date'] + timedelta(hours=lag_hours)
+        for index, chunk in enumerate(chunks):
+            key, chunk_first_day, chunk_last_day = chunk
+            items = None
+            if not self.cache.is_mutable(chunk_last_day):
+                items = self.cache.get(self.url, extra_params, key)
+                if items is None and not (first_day <= chunk_first_day and chunk_last_day <= last_day):
+                    items = self.cache.get(self.url, extra_params, partial_key(chunk_first_day, chunk_last_day))
+            if items is not None:
+                chunk_items[key] = items
+            elif missing_runs and missing_runs[-1][-1] is chunks[index - 1]:
+                missing_runs[-1].append(chunk)
+            else:
+                missing_runs.append([chunk])
         
-        df.index = df['date']
-        df.drop(columns=['date'], inplace=True)
+        for run in missing_runs:
+            # Only request the days in the given range, months that are partly requested are stored under their days.
+            run_first_day = max(run[0][1], first_day)
+            run_last_day = min(run[-1][2], last_day)
+            run_start = start_date_dt
+            if run_first_day != first_day:
+                run_start = start_date_dt.replace(year=run_first_day.year, month=run_first_day.month, day=run_first_day.day, hour=0, minute=0, second=0, microsecond=0)
+            run_end = end_date_dt
+            if run_last_day != last_day:
+                run_end = end_date_dt.replace(year=run_last_day.year, month=run_last_day.month, day=run_last_day.day, hour=0, minute=0, second=0, microsecond=0)
+            items = self._request_items(run_start.isoformat(), run_end.isoformat(), extra_params)
+            
+            for key, _, _ in run:
+                chunk_items[key] = list()
+            for item in items:
+                chunk_items.setdefault(item['date'][:7], list()).append(item)
+            
+            for key, chunk_first_day, chunk_last_day in run:
+                if not chunk_items[key] or self.cache.is_mutable(chunk_last_day):
+                    continue
+                complete = first_day <= chunk_first_day and chunk_last_day <= last_day
+                self.cache.put(self.url, extra_params, key if complete else partial_key(chunk_first_day, chunk_last_day), chunk_items[key])
+        
+        first_day_str = first_day.isoformat()
+        last_day_str = last_day.isoformat()
+        return [
+            item for key, _, _ in chunks for item in chunk_items[key]
+            if first_day_str <= item['date'][:10] <= last_day_str
+        ]
+    
+    def get_data(self, extra_params=None, lag_hours:int=0):
+        if extra_params is None:
+            extra_params = {}
+        profiler = get_profiler()
+        name = type(self).__name__
+        
+        start_date_new_dt, start_date_new_str, end_date_new_dt, end_date_new_str = self._get_start_end_dates(self.start_date, self.end_date, lag_hours)
+        
+        with profiler.span(f"{name}.request"):
+            if self.cache is None:
+                items = self._request_items(start_date_new_str, end_date_new_str, extra_params)
+            else:
+                items = self._get_cached_items(start_date_new_dt, end_date_new_dt, extra_params)
+        profiler.record_endpoint(endpoint_name(self.url), rows=len(items))
+        
+        with profiler.span(f"{name}.parse"):
+            df = pd.DataFrame(items, columns=self.keys)
+            df[self.keys[1:]] = df[self.keys[1:]].astype('float64')
+            
+            # Localize the time and add the lag in a single pass
+            df.index = to_local_index(df['date'], self.tz, lag_hours)
+            df.drop(columns=['date'], inplace=True)
+            df = resolve_duplicates(df, self.dst_duplicates)
         
         # Check if the data is complete for the given date range
-        start_date_dt = parser.parse(self.start_date.split('T')[0]).replace(hour=0)
-        end_date_dt = parser.parse(self.end_date.split('T')[0]).replace(hour=23)
+        start_date_dt = parse_datetime(self.start_date.split('T')[0]).replace(hour=0)
+        end_date_dt = parse_datetime(self.end_date.split('T')[0]).replace(hour=23)
         
         if len(df) == 0:
             raise ValueError('No data available for the given date range.')
 
-        # If the data fetched is not complete, create a new dataframe with the missing dates.
-        if start_date_dt < df.index[0]:
-            temp_date = df.index[0] - timedelta(hours=1)
-            date_range = pd.date_range(start=start_date_dt, end=temp_date, freq='h')
-            df_temp = pd.DataFrame(index=date_range, columns=df.columns)
-            df = pd.concat([df_temp, df])
-        
-        if end_date_dt > df.index[-1]:
-            temp_date = df.index[-1] + timedelta(hours=1)
-            date_range = pd.date_range(start=temp_date, end=end_date_dt, freq='h')
-            df_temp = pd.DataFrame(index=date_range, columns=df.columns)
-            df = pd.concat([df, df_temp])
+        # If the data fetched is not complete, add the missing dates with empty values.
+        with profiler.span(f"{name}.pad"):
+            df = self._pad(df, start_date_dt, end_date_dt)
 
-        return df
\ No newline at end of file
+        return df
+    
+    def parts(self) -> list:
+        """
+        Get the independent requests of the dataset as callables that return a frame each.
+        GetData sends them to its pool as separate tasks, so they count against its max_workers.
+
+        Returns:
+            list: Callables without arguments, combined by combine.
+        """
+        return [self.get_data]
+    
+    def combine(self, frames:list) -> pd.DataFrame:
+        """Combine the frames returned by the callables of parts into the frame of get_data."""
+        return frames[0]
+    
+    def _pad(self, df:pd.DataFrame, start_date_dt:datetime, end_date_dt:datetime) -> pd.DataFrame:
+        """
+        Extend the data to every hour between the given dates, missing hours are NaN.
+
+        Args:
+            df (pd.DataFrame): Data with an hourly datetime index.
+            start_date_dt (datetime): First hour.
+            end_date_dt (datetime): Last hour.
+
+        Returns:
+            pd.DataFrame: Data with every hour between the dates.
+        """
+        index = pd.date_range(min(start_date_dt, df.index[0]), max(end_date_dt, df.index[-1]), freq='h', name='date')
+        if df.index.is_unique:
+            return df.reindex(index)
+        
+        # Repeated hours are kept, only the hours before and after the data are added.
+        missing = index[(index < df.index[0]) | (index > df.index[-1])]
+        df = pd.concat([df, pd.DataFrame(np.nan, index=missing, columns=df.columns)])
+        return df.sort_index(kind='stable')
\ No newline at end of file
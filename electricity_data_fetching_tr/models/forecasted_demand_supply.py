@@ -1,18 +1,30 @@
 import pandas as pd
 
+from functools import partial
+
 from .base import Data
 from .forecasted_demand import ForecastedDemand
 from .forecasted_supply import ForecastedSupply
 
 class ForecastedDemandSupply(Data):
-    def __init__(self, start_date: str, end_date: str, tz:str):
+    columns = ['ForecastedDemandSupply']
+    
+    def __init__(self, start_date: str, end_date: str, tz:str, **kwargs):
         self.start_date = start_date
         self.end_date = end_date
         self.tz = tz
+        # Passed on to ForecastedDemand and ForecastedSupply, e.g. the transport.
+        self.kwargs = kwargs
         
-    def get_data(self, lag_hours:int=24):
-        forecasted_demand = ForecastedDemand(self.start_date, self.end_date, self.tz).get_data(lag_hours=lag_hours)
-        forecasted_supply = ForecastedSupply(self.start_date, self.end_date, self.tz).get_data(lag_hours=lag_hours)
+    def parts(self, lag_hours:int=24) -> list:
+        # Both endpoints are independent, GetData fetches them at the same time.
+        demand = ForecastedDemand(self.start_date, self.end_date, self.tz, **self.kwargs)
+        self._supply = ForecastedSupply(self.start_date, self.end_date, self.tz, **self.kwargs)
+        return [partial(demand.get_data, lag_hours=lag_hours), *self._supply.parts(lag_hours)]
+    
+    def combine(self, frames:list) -> pd.DataFrame:
+        forecasted_demand = frames[0]
+        forecasted_supply = self._supply.combine(frames[1:])
         
         if not forecasted_demand.index.equals(forecasted_supply.index):
             raise ValueError('Indices of the dataframes do not match.')
@@ -20,4 +32,6 @@ class ForecastedDemandSupply(Data):
         demand_supply = forecasted_demand['ForecastedDemand'] / forecasted_supply['ForecastedSupply']
         
         return pd.DataFrame(demand_supply, columns=['ForecastedDemandSupply'])
-        
\ No newline at end of file
+    
+    def get_data(self, lag_hours:int=24):
+        return self.combine([part() for part in self.parts(lag_hours)])
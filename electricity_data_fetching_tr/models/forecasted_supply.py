@@ -1,13 +1,85 @@
+import pandas as pd
+
+from functools import partial
+
 from .base import Data
 
 class ForecastedSupply(Data):
-    def __init__(self, start_date: str, end_date: str, tz:str):
+    """Gets the available installed capacity (AIC) forecasts from the API.
+    Every region is a separate request, all the sources of a region are extracted from the same response.
+    The total of region TR1 is the ForecastedSupply column, the other series are named
+    ForecastedSupply_<source> and ForecastedSupply_<source>_<region>.
+    """
+    columns = ['ForecastedSupply']
+    # Regions and sources fetched by default, 'toplam' is the total of all the sources.
+    regions = ['TR1']
+    sources = ['toplam']
+
+    def __init__(self, start_date: str, end_date: str, tz:str, regions:list=None, sources:list=None, **kwargs):
         url = 'https://seffaflik.epias.com.tr/electricity-service/v1/generation/data/aic'
-        keys = ['date', 'toplam']
-        super().__init__(url, start_date, end_date, keys, tz)
-    
-    def get_data(self, lag_hours:int=24):
-        extra_params = {'region': 'TR1'}
-        df = super().get_data(extra_params=extra_params, lag_hours=lag_hours)
-        df.rename(columns={'toplam': 'ForecastedSupply'}, inplace=True)
+        self.regions = list(regions) if regions is not None else list(type(self).regions)
+        self.sources = list(sources) if sources is not None else list(type(self).sources)
+        self.columns = [self.column_name(source, region) for region in self.regions for source in self.sources]
+        keys = ['date'] + self.sources
+        super().__init__(url, start_date, end_date, keys, tz, **kwargs)
+
+    @staticmethod
+    def column_name(source:str, region:str) -> str:
+        """Get the name of the column of a source in a region, e.g. ForecastedSupply_ruzgar."""
+        name = 'ForecastedSupply'
+        if source != 'toplam':
+            name += f'_{source}'
+        if region != 'TR1':
+            name += f'_{region}'
+        return name
+
+    @classmethod
+    def with_series(cls, regions:list=None, sources:list=None) -> type:
+        """
+        Create a ForecastedSupply class that fetches the given regions and sources, e.g. to pass it to GetData.
+        The class is registered in this module under a name made of the regions and sources, so it can be
+        pickled, e.g. by Backfill, and is recreated from its name in other processes.
+
+        Args:
+            regions (list, optional): Regions, e.g. ['TR1']. Defaults to the regions of the class.
+            sources (list, optional): Sources, e.g. ['toplam', 'ruzgar', 'dogalgaz']. Defaults to the sources of the class.
+
+        Returns:
+            type: Subclass of ForecastedSupply.
+        """
+        regions = list(regions) if regions is not None else list(cls.regions)
+        sources = list(sources) if sources is not None else list(cls.sources)
+        if not all(name.isalnum() for name in regions + sources):
+            raise ValueError('Regions and sources must only contain letters and digits.')
+        name = f"ForecastedSupply__{'_'.join(regions)}__{'_'.join(sources)}"
+        subclass = globals().get(name)
+        if subclass is None:
+            columns = [cls.column_name(source, region) for region in regions for source in sources]
+            subclass = type(name, (ForecastedSupply,), {'regions': regions, 'sources': sources, 'columns': columns, '__module__': __name__})
+            globals()[name] = subclass
+        return subclass
+
+    def _get_region_data(self, region:str, lag_hours:int) -> pd.DataFrame:
+        df = super().get_data(extra_params={'region': region}, lag_hours=lag_hours)
+        df.columns = [self.column_name(source, region) for source in self.sources]
         return df
+
+    def parts(self, lag_hours:int=24) -> list:
+        # Regions are independent, GetData fetches them at the same time.
+        return [partial(self._get_region_data, region, lag_hours) for region in self.regions]
+
+    def combine(self, frames:list) -> pd.DataFrame:
+        return frames[0] if len(frames) == 1 else pd.concat(frames, axis=1)
+
+    def get_data(self, lag_hours:int=24):
+        return self.combine([part() for part in self.parts(lag_hours)])
+
+def __getattr__(name:str):
+    # Classes created by with_series in another process, e.g. when they are unpickled by the workers of Backfill.
+    if name.startswith('ForecastedSupply__'):
+        try:
+            regions, sources = name[len('ForecastedSupply__'):].split('__')
+            return ForecastedSupply.with_series(regions.split('_'), sources.split('_'))
+        except ValueError:
+            pass
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
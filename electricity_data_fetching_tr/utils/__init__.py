@@ -0,0 +1,21 @@
+from .._lazy import lazy_exports
+
+# profiling has the name of its submodule, which is bound to the package when other submodules import it,
+# so it is imported eagerly, it only depends on the standard library.
+from .profiling import Profiler, get_profiler, set_profiler, profiling
+
+# Public names and the submodules they are defined in
+_EXPORTS = {
+    'Transport': '.transport',
+    'ResponseCache': '.cache',
+    'FetchCoordinator': '.coordinator',
+    'parse_datetime': '.timeparse',
+    'to_local_index': '.timeparse',
+    'resolve_duplicates': '.timeparse',
+    'get_default_transport': '.transport',
+    'set_default_transport': '.transport',
+}
+
+__all__ = ['Profiler', 'get_profiler', 'set_profiler', 'profiling', *_EXPORTS]
+
+__getattr__, __dir__ = lazy_exports(globals(), _EXPORTS)
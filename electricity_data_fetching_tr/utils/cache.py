@@ -0,0 +1,161 @@
+import json
+import time
+import zlib
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+def month_chunks(start:date, end:date) -> list:
+    """
+    Split a date range into calendar months, the unit responses are cached in.
+
+    Args:
+        start (date): First day of the range.
+        end (date): Last day of the range.
+
+    Returns:
+        list: (key, first day, last day) tuples, key is in the format 'YYYY-MM'.
+    """
+    chunks = list()
+    first = start.replace(day=1)
+    while first <= end:
+        next_first = (first + timedelta(days=32)).replace(day=1)
+        chunks.append((first.strftime('%Y-%m'), first, next_first - timedelta(days=1)))
+        first = next_first
+    return chunks
+
+class ResponseCache:
+    """Persistent cache of the items returned by the API.
+    Items are stored per URL, extra parameters and month in an SQLite database.
+    Months that contain the last few days are considered mutable and are always fetched again.
+    """
+    def __init__(self, path:str='epias_cache.sqlite', mutable_days:int=3, max_bytes:int=None, max_entries:int=None):
+        """
+        Initialize the ResponseCache class.
+
+        Args:
+            path (str, optional): Path of the SQLite database. Defaults to 'epias_cache.sqlite'.
+            mutable_days (int, optional): Months ending less than this many days ago are not cached. Defaults to 3.
+            max_bytes (int, optional): Maximum size of the stored payloads, least recently used months are evicted. Defaults to None.
+            max_entries (int, optional): Maximum number of stored months, least recently used months are evicted. Defaults to None.
+        """
+        self.path = path
+        self.mutable_days = mutable_days
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        
+        with self._connect() as connection:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS responses ('
+                'url TEXT, params TEXT, chunk TEXT, payload BLOB, size INTEGER, fetched_at REAL, accessed_at REAL, '
+                'PRIMARY KEY (url, params, chunk))'
+            )
+            connection.execute('CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)')
+    
+    def __getstate__(self):
+        # The lock is not sent to other processes, e.g. the workers of Backfill.
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+    
+    @contextmanager
+    def _connect(self):
+        # A new connection for every operation keeps the cache usable from the worker threads and other processes.
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+    
+    def _params_key(self, params:dict) -> str:
+        return json.dumps(params or {}, sort_keys=True)
+    
+    def is_mutable(self, last_day:date) -> bool:
+        """
+        Check if a month can still change in the API.
+
+        Args:
+            last_day (date): Last day of the month.
+
+        Returns:
+            bool: True if the month ends less than mutable_days days ago.
+        """
+        return last_day >= datetime.now().date() - timedelta(days=self.mutable_days)
+    
+    def get(self, url:str, params:dict, chunk:str):
+        """
+        Get the cached items of a month.
+
+        Args:
+            url (str): URL of the dataset.
+            params (dict): Extra parameters sent with the request.
+            chunk (str): Month in the format 'YYYY-MM'.
+
+        Returns:
+            list: Items of the month, None if they are not cached.
+        """
+        params_key = self._params_key(params)
+        with self._lock, self._connect() as connection:
+            row = connection.execute(
+                'SELECT payload FROM responses WHERE url = ? AND params = ? AND chunk = ?', (url, params_key, chunk)
+            ).fetchone()
+            if row is None:
+                return None
+            connection.execute(
+                'UPDATE responses SET accessed_at = ? WHERE url = ? AND params = ? AND chunk = ?',
+                (time.time(), url, params_key, chunk)
+            )
+        return json.loads(zlib.decompress(row[0]))
+    
+    def put(self, url:str, params:dict, chunk:str, items:list):
+        """
+        Store the items of a month and evict the least recently used months if the limits are exceeded.
+
+        Args:
+            url (str): URL of the dataset.
+            params (dict): Extra parameters sent with the request.
+            chunk (str): Month in the format 'YYYY-MM'.
+            items (list): Items of the month.
+        """
+        payload = zlib.compress(json.dumps(items).encode())
+        now = time.time()
+        with self._lock, self._connect() as connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (url, self._params_key(params), chunk, payload, len(payload), now, now)
+            )
+            self._evict(connection)
+    
+    def _evict(self, connection:sqlite3.Connection):
+        if self.max_bytes is None and self.max_entries is None:
+            return
+        entries, total_bytes = connection.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses').fetchone()
+        rows = connection.execute('SELECT rowid, size FROM responses ORDER BY accessed_at').fetchall()
+        evicted = list()
+        for rowid, size in rows:
+            too_many = self.max_entries is not None and entries > self.max_entries
+            too_large = self.max_bytes is not None and total_bytes > self.max_bytes
+            if not (too_many or too_large):
+                break
+            evicted.append((rowid,))
+            entries -= 1
+            total_bytes -= size
+        connection.executemany('DELETE FROM responses WHERE rowid = ?', evicted)
+    
+    def size(self) -> int:
+        """Get the total size of the stored payloads in bytes."""
+        with self._connect() as connection:
+            return connection.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+    
+    def clear(self):
+        """Remove every cached response."""
+        with self._lock, self._connect() as connection:
+            connection.execute('DELETE FROM responses')
@@ -0,0 +1,236 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+from .transport import get_default_transport
+
+class _Flight:
+    """Request of an endpoint for a range of days, in flight or recently completed."""
+    __slots__ = ('first_day', 'last_day', 'done', 'response', 'error', 'completed_at')
+
+    def __init__(self, first_day:str, last_day:str):
+        self.first_day = first_day
+        self.last_day = last_day
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+        self.completed_at = None
+
+    def contains(self, first_day:str, last_day:str) -> bool:
+        return self.first_day <= first_day and last_day <= self.last_day
+
+class FetchCoordinator:
+    """Deduplicates the requests of the datasets shared by several GetData, UpdateData or HotCache instances.
+    It is used as their transport: a request for the days of an endpoint that another caller is already
+    fetching, or fetched less than ttl seconds ago, waits for that response and gets the items of its own
+    days from it instead of sending a new request. With shared_dir, the responses are also shared with the
+    other processes through files, guarded by lock files. The empty lock files stay in shared_dir, they can be
+    removed when no process uses it.
+    """
+    def __init__(self, transport=None, ttl:float=60, max_entries:int=64, shared_dir:str=None, shared_ttl:float=None):
+        """
+        Initialize the FetchCoordinator class.
+
+        Args:
+            transport (Transport, optional): Transport that sends the requests. Defaults to the shared transport.
+            ttl (float, optional): Seconds a completed response is reused for. Defaults to 60.
+            max_entries (int, optional): Maximum number of completed responses kept in memory. Defaults to 64.
+            shared_dir (str, optional): Directory the responses are shared with other processes in, POSIX only. Defaults to None.
+            shared_ttl (float, optional): Seconds a response in shared_dir is reused for. Defaults to ttl.
+        """
+        self.transport = transport if transport is not None else get_default_transport()
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.shared_dir = shared_dir
+        self.shared_ttl = shared_ttl if shared_ttl is not None else ttl
+        if shared_dir is not None:
+            # Lock files need fcntl, which is not available on Windows.
+            import fcntl
+            self._fcntl = fcntl
+            os.makedirs(shared_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        # Flights of every endpoint and parameters, completed ones are kept in the order they completed.
+        self._flights = {}
+        self._completed = OrderedDict()
+        self._stats = {'requests': 0, 'sent': 0, 'coalesced': 0, 'memo_hits': 0, 'shared_hits': 0}
+
+    def __getstate__(self):
+        # Only the settings are sent to other processes, e.g. the workers of Backfill, they share the
+        # responses through shared_dir.
+        state = {name: value for name, value in self.__dict__.items() if name not in ('_fcntl', '_lock', '_flights', '_completed')}
+        state['_stats'] = dict.fromkeys(self._stats, 0)
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.shared_dir is not None:
+            import fcntl
+            self._fcntl = fcntl
+        self._lock = threading.Lock()
+        self._flights = {}
+        self._completed = OrderedDict()
+    
+    def __getattr__(self, name:str):
+        # Behave like the wrapped transport, e.g. for get_stats, reset_stats or timeout.
+        if name == 'transport':
+            raise AttributeError(name)
+        return getattr(self.transport, name)
+
+    def _count(self, name:str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def get_coalescing_stats(self) -> dict:
+        """
+        Get the number of requests received, sent to the transport, coalesced with a request in flight and
+        served from the completed responses of this process and of other processes.
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    def _expire(self, now:float):
+        """Forget the completed responses that are too old or too many. Called with the lock held."""
+        while self._completed:
+            flight, key = next(iter(self._completed.items()))
+            if now - flight.completed_at < self.ttl and len(self._completed) <= self.max_entries:
+                break
+            self._completed.popitem(last=False)
+            self._flights[key].remove(flight)
+            if not self._flights[key]:
+                del self._flights[key]
+
+    @staticmethod
+    def _select(response:dict, first_day:str, last_day:str) -> dict:
+        """Get the items of the given days from a response that contains them."""
+        items = [item for item in response['items'] if first_day <= item['date'][:10] <= last_day]
+        return dict(response, items=items)
+
+    def request(self, method:str, url:str, headers:dict=None, data=None) -> dict:
+        """
+        Send a request, or get its items from a request of the same endpoint and parameters for the same
+        or more days that is in flight or recently completed.
+
+        Args:
+            method (str): Method of the request.
+            url (str): URL to send the request to.
+            headers (dict, optional): Headers of the request. Defaults to None.
+            data (str, optional): Body of the request. Defaults to None.
+
+        Returns:
+            dict: Response of the request.
+        """
+        body = json.loads(data) if data else {}
+        if not isinstance(body, dict) or 'startDate' not in body or 'endDate' not in body:
+            # Only the requests of a range of days are coordinated.
+            return self.transport.request(method, url, headers=headers, data=data)
+
+        self._count('requests')
+        params = {name: value for name, value in body.items() if name not in ('startDate', 'endDate')}
+        key = (method, url, json.dumps(params, sort_keys=True))
+        # The API returns whole days, ranges are compared by their local days.
+        first_day, last_day = body['startDate'][:10], body['endDate'][:10]
+
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            flight = next((
+                flight for flight in self._flights.get(key, [])
+                if flight.contains(first_day, last_day) and flight.error is None
+            ), None)
+            owner = flight is None
+            if owner:
+                flight = _Flight(first_day, last_day)
+                self._flights.setdefault(key, []).append(flight)
+            else:
+                self._stats['coalesced' if flight.completed_at is None else 'memo_hits'] += 1
+
+        if owner:
+            try:
+                flight.response = self._fetch(key, method, url, headers, data, first_day, last_day)
+                with self._lock:
+                    flight.completed_at = time.monotonic()
+                    self._completed[flight] = key
+            except BaseException as e:
+                flight.error = e
+                with self._lock:
+                    self._flights[key].remove(flight)
+                    if not self._flights[key]:
+                        del self._flights[key]
+                raise
+            finally:
+                flight.done.set()
+            return dict(flight.response)
+
+        flight.done.wait()
+        if flight.error is not None:
+            # The callers of the same days get the same error instead of sending the failed request again.
+            raise flight.error
+        if (flight.first_day, flight.last_day) == (first_day, last_day):
+            return dict(flight.response)
+        return self._select(flight.response, first_day, last_day)
+
+    def _fetch(self, key:tuple, method:str, url:str, headers:dict, data, first_day:str, last_day:str) -> dict:
+        """Send a request, through the files of shared_dir if it is set."""
+        if self.shared_dir is None:
+            self._count('sent')
+            return self.transport.request(method, url, headers=headers, data=data)
+
+        name = hashlib.sha1(repr(key).encode()).hexdigest()[:16]
+        lock_path = os.path.join(self.shared_dir, f"{name}_{first_day}_{last_day}.lock")
+        with open(lock_path, 'a') as lock:
+            # A process fetching the same days holds the lock until its response is written.
+            self._fcntl.flock(lock, self._fcntl.LOCK_EX)
+            try:
+                response = self._read_shared(name, first_day, last_day)
+                if response is not None:
+                    self._count('shared_hits')
+                    return response
+                self._count('sent')
+                response = self.transport.request(method, url, headers=headers, data=data)
+                path = os.path.join(self.shared_dir, f"{name}_{first_day}_{last_day}.json")
+                with open(path + '_temp', 'w') as f:
+                    json.dump(response, f)
+                os.replace(path + '_temp', path)
+                return response
+            finally:
+                self._fcntl.flock(lock, self._fcntl.LOCK_UN)
+
+    @staticmethod
+    def _remove(path:str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _read_shared(self, name:str, first_day:str, last_day:str) -> dict:
+        """Get the items of the given days from a fresh response in shared_dir, None if there is none."""
+        now = time.time()
+        for file_name in os.listdir(self.shared_dir):
+            if not file_name.startswith(name + '_'):
+                continue
+            path = os.path.join(self.shared_dir, file_name)
+            # Lock files are never removed, a process waiting for the lock of a removed file would not exclude
+            # the processes that create a new one. Their locks are released when their holders exit.
+            if not file_name.endswith('.json'):
+                continue
+            try:
+                age = now - os.path.getmtime(path)
+            except OSError:
+                continue
+            if age >= self.shared_ttl:
+                # Responses are written atomically, removing an expired one does not affect its readers.
+                self._remove(path)
+                continue
+            file_first_day, file_last_day = file_name[len(name) + 1:-len('.json')].split('_')
+            if file_first_day <= first_day and last_day <= file_last_day:
+                try:
+                    with open(path) as f:
+                        response = json.load(f)
+                except (OSError, ValueError):
+                    continue
+                return self._select(response, first_day, last_day)
+        return None
@@ -0,0 +1,148 @@
+import json
+import time
+import logging
+import threading
+from contextlib import contextmanager, nullcontext
+
+logger = logging.getLogger('electricity_data_fetching_tr')
+
+class NullProfiler:
+    """Profiler used when profiling is not enabled, records nothing."""
+    def span(self, name:str):
+        return nullcontext()
+    
+    def record_endpoint(self, endpoint:str, rows:int=0, n_bytes:int=0):
+        pass
+    
+    def record_error(self, where:str, error:Exception):
+        pass
+
+class Profiler(NullProfiler):
+    """Records the time spent in every stage of the pipeline, the rows and bytes received from every endpoint
+    and the errors. Safe to use from the worker threads.
+    """
+    def __init__(self, log_spans:bool=False):
+        """
+        Initialize the Profiler class.
+
+        Args:
+            log_spans (bool, optional): Log every finished span at DEBUG level. Defaults to False.
+        """
+        self.log_spans = log_spans
+        self._lock = threading.Lock()
+        self.reset()
+    
+    def reset(self):
+        """Forget everything recorded so far."""
+        with self._lock:
+            self._spans = {}
+            self._endpoints = {}
+            self._errors = list()
+    
+    @contextmanager
+    def span(self, name:str):
+        """
+        Measure the time spent in a block.
+
+        Args:
+            name (str): Name of the stage, spans with the same name are aggregated.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                stats = self._spans.setdefault(name, {'count': 0, 'total': 0.0, 'max': 0.0})
+                stats['count'] += 1
+                stats['total'] += elapsed
+                stats['max'] = max(stats['max'], elapsed)
+            if self.log_spans:
+                logger.debug('%s took %.6f s', name, elapsed)
+    
+    def record_endpoint(self, endpoint:str, rows:int=0, n_bytes:int=0):
+        """
+        Record the rows or bytes received from an endpoint.
+
+        Args:
+            endpoint (str): Name of the endpoint.
+            rows (int, optional): Number of rows received. Defaults to 0.
+            n_bytes (int, optional): Number of bytes received. Defaults to 0.
+        """
+        with self._lock:
+            stats = self._endpoints.setdefault(endpoint, {'responses': 0, 'rows': 0, 'bytes': 0})
+            stats['responses'] += int(n_bytes > 0)
+            stats['rows'] += rows
+            stats['bytes'] += n_bytes
+    
+    def record_error(self, where:str, error:Exception):
+        """
+        Record an error that was handled.
+
+        Args:
+            where (str): Stage the error happened in.
+            error (Exception): The error.
+        """
+        with self._lock:
+            self._errors.append({'where': where, 'type': type(error).__name__, 'message': str(error)})
+    
+    def report(self) -> dict:
+        """
+        Get everything recorded so far.
+
+        Returns:
+            dict: Timing of every span in seconds, counts of every endpoint and the errors.
+        """
+        with self._lock:
+            spans = {name: dict(stats, mean=stats['total'] / stats['count']) for name, stats in self._spans.items()}
+            endpoints = {endpoint: dict(stats) for endpoint, stats in self._endpoints.items()}
+            errors = list(self._errors)
+        return {'spans': spans, 'endpoints': endpoints, 'errors': errors}
+    
+    def to_json(self, path:str=None) -> str:
+        """
+        Get the report as JSON and optionally write it to a file.
+
+        Args:
+            path (str, optional): Path of the file to write the report to. Defaults to None.
+
+        Returns:
+            str: Report in JSON format.
+        """
+        report = json.dumps(self.report(), indent=2)
+        if path is not None:
+            with open(path, 'w') as f:
+                f.write(report)
+        return report
+    
+    def log_report(self, level:int=logging.INFO):
+        """Log the report as JSON."""
+        logger.log(level, 'Profile report: %s', json.dumps(self.report()))
+
+
+_profiler = NullProfiler()
+
+def get_profiler():
+    """Get the profiler the pipeline reports to."""
+    return _profiler
+
+def set_profiler(profiler):
+    """Enable profiling with the given profiler, None disables it."""
+    global _profiler
+    _profiler = profiler if profiler is not None else NullProfiler()
+
+@contextmanager
+def profiling(profiler:Profiler=None):
+    """
+    Enable profiling in a block, the previous profiler is restored at the end.
+
+    Args:
+        profiler (Profiler, optional): Profiler to use. Defaults to a new Profiler.
+    """
+    profiler = profiler if profiler is not None else Profiler()
+    previous = get_profiler()
+    set_profiler(profiler)
+    try:
+        yield profiler
+    finally:
+        set_profiler(previous)
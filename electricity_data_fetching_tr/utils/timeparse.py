@@ -0,0 +1,64 @@
+import pandas as pd
+from datetime import datetime
+
+# Format of the dates returned by the API, e.g. '2024-01-01T00:00:00+03:00'
+EPIAS_DATE_FORMAT = '%Y-%m-%dT%H:%M:%S%z'
+
+def parse_datetime(value:str) -> datetime:
+    """
+    Parse a datetime string. ISO 8601 strings are parsed without guessing the format,
+    other formats fall back to dateutil.
+
+    Args:
+        value (str): Datetime string.
+
+    Returns:
+        datetime: Datetime object.
+    """
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        from dateutil import parser
+        return parser.parse(value)
+
+def to_local_index(dates, tz:str, lag_hours:int=0) -> pd.DatetimeIndex:
+    """
+    Convert the dates returned by the API to a naive index in local time in a single vectorized pass.
+
+    Args:
+        dates (list-like): Dates in ISO 8601 format with a UTC offset.
+        tz (str): Timezone the dates are converted to.
+        lag_hours (int, optional): Number of hours added to the dates. Defaults to 0.
+
+    Returns:
+        pd.DatetimeIndex: Naive local dates.
+    """
+    dates = pd.Index(dates)
+    try:
+        index = pd.to_datetime(dates, format=EPIAS_DATE_FORMAT, utc=True)
+    except ValueError:
+        index = pd.to_datetime(dates, format='ISO8601', utc=True)
+    index = index.tz_convert(tz).tz_localize(None)
+    if lag_hours:
+        index = index + pd.Timedelta(hours=lag_hours)
+    return index.rename('date')
+
+def resolve_duplicates(df:pd.DataFrame, how:str='first') -> pd.DataFrame:
+    """
+    Resolve the hours that appear twice in local time, e.g. when the clocks were set back before 2016.
+
+    Args:
+        df (pd.DataFrame): Data with a naive local datetime index.
+        how (str, optional): 'first' or 'last' to keep one of the rows, 'mean' to average them,
+        'keep' to keep both. Defaults to 'first'.
+
+    Returns:
+        pd.DataFrame: Data with a unique index, unless how is 'keep'.
+    """
+    if how == 'keep' or df.index.is_unique:
+        return df
+    if how == 'mean':
+        return df.groupby(level=0, sort=False).mean()
+    if how in ('first', 'last'):
+        return df[~df.index.duplicated(keep=how)]
+    raise ValueError("how must be one of 'first', 'last', 'mean' or 'keep'.")
@@ -0,0 +1,196 @@
+import time
+import random
+import threading
+from urllib.parse import urlsplit
+
+from .profiling import get_profiler
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+def endpoint_name(url:str) -> str:
+    """Get the name the statistics of a URL are recorded under."""
+    parts = urlsplit(url)
+    return f"{parts.netloc}{parts.path}"
+
+class Transport:
+    """Shared HTTP transport for the dataset classes.
+    Keeps the connections to the API alive, retries failed requests with exponential backoff and jitter
+    and records the latency and retry counts of every endpoint.
+    """
+    def __init__(self, timeout:tuple=(10, 120), max_retries:int=4, backoff_factor:float=1.0, backoff_max:float=60.0,
+                 jitter:float=0.5, pool_maxsize:int=16, retry_statuses:tuple=RETRY_STATUSES):
+        """
+        Initialize the Transport class.
+
+        Args:
+            timeout (tuple, optional): Connect and read timeouts in seconds. Defaults to (10, 120).
+            max_retries (int, optional): Number of retries after the first attempt. Defaults to 4.
+            backoff_factor (float, optional): Base of the exponential backoff in seconds. Defaults to 1.0.
+            backoff_max (float, optional): Maximum time to wait between two attempts in seconds. Defaults to 60.0.
+            jitter (float, optional): Maximum random delay added to the backoff, as a ratio of the backoff. Defaults to 0.5.
+            pool_maxsize (int, optional): Number of connections kept alive per host. Defaults to 16.
+            retry_statuses (tuple, optional): HTTP status codes that are retried. Defaults to RETRY_STATUSES.
+        """
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        self.pool_maxsize = pool_maxsize
+        self.retry_statuses = retry_statuses
+        
+        self._session = None
+        self._lock = threading.Lock()
+        self._stats = {}
+    
+    def __getstate__(self):
+        # The lock and the connections are not sent to other processes, e.g. the workers of Backfill.
+        state = self.__dict__.copy()
+        del state['_lock']
+        state['_session'] = None
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+    
+    @property
+    def session(self) -> 'requests.Session':
+        """Session shared by all the requests, created on first use."""
+        # requests is only imported when a request is sent, reading local data does not need it.
+        import requests
+        from requests.adapters import HTTPAdapter
+        
+        with self._lock:
+            if self._session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_maxsize)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self._session = session
+        return self._session
+    
+    def close(self):
+        """Close the connections kept alive by the session."""
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+    
+    def _perform(self, method:str, url:str, headers:dict, data):
+        """Send a single request. Overridden to replace the network, e.g. in benchmarks."""
+        return self.session.request(method, url, headers=headers, data=data, timeout=self.timeout)
+    
+    def _backoff(self, attempt:int, response=None) -> float:
+        """
+        Get the time to wait before the next attempt.
+        Uses the Retry-After header of the response if the API sent one.
+
+        Args:
+            attempt (int): Number of the failed attempt, starting from 0.
+            response (requests.Response, optional): Response of the failed attempt. Defaults to None.
+
+        Returns:
+            float: Time to wait in seconds.
+        """
+        if response is not None:
+            retry_after = response.headers.get('Retry-After')
+            if retry_after is not None:
+                try:
+                    return min(float(retry_after), self.backoff_max)
+                except ValueError:
+                    pass
+        delay = min(self.backoff_max, self.backoff_factor * 2 ** attempt)
+        return delay + random.uniform(0, self.jitter * delay)
+    
+    def _record(self, endpoint:str, latency:float, retried:bool=False, failed:bool=False, n_bytes:int=0):
+        with self._lock:
+            stats = self._stats.setdefault(endpoint, {
+                'requests': 0, 'retries': 0, 'failures': 0, 'bytes': 0, 'total_latency': 0.0, 'max_latency': 0.0
+            })
+            stats['requests'] += 1
+            stats['retries'] += int(retried)
+            stats['failures'] += int(failed)
+            stats['bytes'] += n_bytes
+            stats['total_latency'] += latency
+            stats['max_latency'] = max(stats['max_latency'], latency)
+    
+    def get_stats(self) -> dict:
+        """
+        Get the statistics of every endpoint requested so far.
+
+        Returns:
+            dict: Number of requests, retries, failures, bytes received and the latencies in seconds for every endpoint.
+        """
+        with self._lock:
+            stats = {endpoint: dict(values) for endpoint, values in self._stats.items()}
+        for values in stats.values():
+            values['mean_latency'] = values['total_latency'] / values['requests']
+        return stats
+    
+    def reset_stats(self):
+        """Forget the statistics recorded so far."""
+        with self._lock:
+            self._stats = {}
+    
+    def request(self, method:str, url:str, headers:dict=None, data=None) -> dict:
+        """
+        Send a request and retry it if it fails with a connection error, a timeout or a retryable status code.
+
+        Args:
+            method (str): Method of the request.
+            url (str): URL to send the request to.
+            headers (dict, optional): Headers of the request. Defaults to None.
+            data (str, optional): Body of the request. Defaults to None.
+
+        Returns:
+            dict: Response of the request.
+        """
+        import requests
+        
+        endpoint = endpoint_name(url)
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                response = self._perform(method, url, headers, data)
+            except (requests.ConnectionError, requests.Timeout):
+                latency = time.perf_counter() - start
+                if attempt >= self.max_retries:
+                    self._record(endpoint, latency, failed=True)
+                    raise
+                self._record(endpoint, latency, retried=True)
+                time.sleep(self._backoff(attempt))
+                attempt += 1
+                continue
+            
+            latency = time.perf_counter() - start
+            if response.status_code in self.retry_statuses and attempt < self.max_retries:
+                self._record(endpoint, latency, retried=True)
+                time.sleep(self._backoff(attempt, response))
+                attempt += 1
+                continue
+            
+            failed = response.status_code >= 400
+            self._record(endpoint, latency, failed=failed, n_bytes=len(response.content))
+            get_profiler().record_endpoint(endpoint, n_bytes=len(response.content))
+            response.raise_for_status()
+            return response.json()
+
+
+_default_transport = None
+_default_transport_lock = threading.Lock()
+
+def get_default_transport() -> Transport:
+    """Get the transport shared by all the dataset classes that are not given one."""
+    global _default_transport
+    with _default_transport_lock:
+        if _default_transport is None:
+            _default_transport = Transport()
+        return _default_transport
+
+def set_default_transport(transport:Transport):
+    """Replace the transport shared by all the dataset classes that are not given one."""
+    global _default_transport
+    with _default_transport_lock:
+        _default_transport = transport
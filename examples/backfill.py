@@ -0,0 +1,7 @@
+from electricity_data_fetching_tr.core import Backfill
+
+# Rebuild the dataset from 2017 with 8 processes, every process fetches and writes its own shard.
+# The shards are checked for gaps and overlaps and merged into data.csv.
+if __name__ == '__main__':
+    backfill = Backfill(shards=8, processes=8)
+    backfill.run('2017-01-01', '2024-06-18', file_name='data')
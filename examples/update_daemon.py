@@ -0,0 +1,13 @@
+import time
+from electricity_data_fetching_tr.core import UpdateDaemon
+
+# Keeps data.csv up to date in a single long running process.
+# The day ahead prices of tomorrow are patched in a few minutes after they are published at 14:00.
+# Health and metrics are served on http://127.0.0.1:8080/health and /metrics.
+daemon = UpdateDaemon('data', port=8080)
+daemon.start()
+try:
+    while True:
+        time.sleep(3600)
+except KeyboardInterrupt:
+    daemon.stop()
@@ -14,6 +14,9 @@ setup(
         'forex-python',
         'workalendar',
     ],
+    extras_require={
+        'parquet': ['pyarrow'],
+    },
     author='Rojen Arda Şeşen',
     author_email='sesen19@itu.edu.tr',
     description='Uses the EPIAS API to fetch electricity data for Turkey. The package also cleans and structures the data to be used in forecasting models.',
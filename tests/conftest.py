@@ -0,0 +1,5 @@
+import os
+import sys
+
+# StubTransport of the benchmarks answers the requests offline.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
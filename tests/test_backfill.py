@@ -0,0 +1,27 @@
+import os
+import pickle
+import numpy as np
+
+from stub import StubTransport
+
+from electricity_data_fetching_tr.core import Backfill, GetData
+
+def test_transport_is_picklable():
+    transport = StubTransport()
+    transport.session
+    copy = pickle.loads(pickle.dumps(transport))
+    assert copy._session is None
+    assert copy.failure_rate == transport.failure_rate
+
+def test_backfill_with_transport(tmp_path):
+    transport = StubTransport()
+    backfill = Backfill(shards=3, processes=2, dataset_dir=str(tmp_path), transport=transport)
+    path = backfill.run('2024-01-01', '2024-02-29', file_name='backfill')
+
+    GetData(dataset_dir=str(tmp_path), transport=transport).get_data('2024-01-01', '2024-02-29', file_name='reference')
+    merged = backfill.storage_class(path).read()
+    reference = backfill.storage_class(os.path.join(str(tmp_path), 'reference.csv')).read()
+    assert merged.index.equals(reference.index)
+    assert np.allclose(merged.to_numpy(dtype='float64'), reference.to_numpy(dtype='float64'), equal_nan=True)
+    # The shards and their directory are removed after the merge.
+    assert not os.path.exists(backfill.shard_dir)
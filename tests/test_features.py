@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+
+from electricity_data_fetching_tr.core.features import FeatureEngine, rolling_moments
+
+def make_data(days:int=60, seed:int=0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    index = pd.date_range('2024-01-01', periods=days * 24, freq='h', name='date')
+    price = 2000 + 300 * rng.standard_normal(len(index))
+    balancing = 2500 + 400 * rng.standard_normal(len(index))
+    price[rng.random(len(index)) < 0.02] = np.nan
+    # Capped prices, the windows inside these hours have a standard deviation of 0.
+    price[500:900] = 2700.57
+    balancing[600:1000] = 3400.0
+    return pd.DataFrame({'Price': price, 'BalancingMarketPrice': balancing}, index=index)
+
+def test_constant_windows_have_zero_std():
+    df = make_data()
+    features = FeatureEngine().transform(df)
+    assert (features['Price_std24'].iloc[600:900] == 0).all()
+    assert (features['Price_std168'].iloc[700:900] == 0).all()
+    assert (features['BalancingMarketPrice_std168'].iloc[800:1000] == 0).all()
+
+def test_rolling_moments_match_pandas():
+    values = make_data()['Price'].to_numpy()
+    for window in (2, 24, 168):
+        mean, std = rolling_moments(values, window, min_periods=1)
+        expected = pd.Series(values).rolling(window, min_periods=1)
+        np.testing.assert_allclose(mean, expected.mean().to_numpy(), rtol=1e-10)
+        np.testing.assert_allclose(std, expected.std().to_numpy(), rtol=1e-6, atol=1e-3)
+
+def test_incremental_update_equals_full_recompute(tmp_path):
+    df = make_data()
+    full = FeatureEngine().transform(df)
+
+    engine = FeatureEngine(rewind_hours=24)
+    path = str(tmp_path / 'data.csv.features.npz')
+    frames = []
+    bounds = [0, 30, 24 * 10, 24 * 10 + 7, 24 * 33, len(df)]
+    for first, last in zip(bounds[:-1], bounds[1:]):
+        frames.append(engine.update(df.iloc[first:last]))
+        # The state is saved and loaded between the updates, like UpdateData does.
+        engine.save(path)
+        engine = FeatureEngine(rewind_hours=24)
+        assert engine.load(path)
+    incremental = pd.concat(frames)
+
+    assert incremental.index.equals(full.index)
+    for name in full.columns:
+        assert np.array_equal(incremental[name].to_numpy(), full[name].to_numpy(), equal_nan=True), name
+
+def test_rewound_update_equals_full_recompute():
+    df = make_data()
+    full = FeatureEngine().transform(df)
+
+    engine = FeatureEngine()
+    engine.update(df.iloc[:24 * 40])
+    # The last days are computed again, e.g. by UpdateData with replace_last_day.
+    rewound = engine.update(df.iloc[24 * 38:])
+    for name in full.columns:
+        assert np.array_equal(rewound[name].to_numpy(), full[name].to_numpy()[24 * 38:], equal_nan=True), name
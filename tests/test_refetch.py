@@ -0,0 +1,69 @@
+import os
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+from stub import StubTransport
+
+from electricity_data_fetching_tr.core import GetData, UpdateData
+from electricity_data_fetching_tr.core.storage import STORAGE_CLASSES
+
+class RevisingTransport(StubTransport):
+    """Adds 5 to the balancing market prices of the revised day."""
+    revised_day = None
+
+    def request(self, method:str, url:str, headers:dict=None, data=None) -> dict:
+        response = super().request(method, url, headers=headers, data=data)
+        if self.revised_day is not None and url.endswith('system-marginal-price'):
+            for item in response['items']:
+                if item['date'].startswith(self.revised_day):
+                    item['systemMarginalPrice'] += 5
+        return response
+
+def snapshot(path:str) -> dict:
+    """Get the bytes of the dataset, a file or a directory."""
+    if os.path.isfile(path):
+        with open(path, 'rb') as f:
+            return {'': f.read()}
+    files = {}
+    for root, _, names in os.walk(path):
+        for name in names:
+            with open(os.path.join(root, name), 'rb') as f:
+                files[os.path.relpath(os.path.join(root, name), path)] = f.read()
+    return files
+
+@pytest.mark.parametrize('storage', sorted(STORAGE_CLASSES))
+def test_refetch_patches_only_the_changed_days(tmp_path, storage):
+    today = date.today()
+    start, end = str(today - timedelta(days=20)), str(today - timedelta(days=1))
+    transport = RevisingTransport()
+    GetData(dataset_dir=str(tmp_path), transport=transport, storage=storage).get_data(start, end, file_name='data')
+    updater = UpdateData('data', dataset_dir=str(tmp_path), transport=transport, storage=storage)
+    path = updater.storage.path
+    before = updater.storage.read()
+    written = snapshot(path)
+
+    # Nothing changed, the dataset is not rewritten.
+    assert sum(updater.refetch().values()) == 0
+    assert snapshot(path) == written
+
+    # A balancing market price within its revision days is revised, it is stored 48 hours later.
+    transport.revised_day = str(today - timedelta(days=4))
+    assert updater.refetch() == {'BalancingMarketPrices': 1}
+    after = updater.storage.read()
+    assert after.index.equals(before.index)
+    changed = ~np.isclose(after.to_numpy(dtype='float64'), before.to_numpy(dtype='float64'), equal_nan=True)
+    rows, columns = np.nonzero(changed)
+    assert set(after.columns[columns]) == {'BalancingMarketPrice'}
+    assert set(after.index[rows].normalize()) == {pd.Timestamp(today - timedelta(days=2))}
+
+    # The patched dataset equals the dataset fetched with the revised values.
+    GetData(dataset_dir=str(tmp_path), transport=transport, storage=storage).get_data(start, end, file_name='reference')
+    reference = STORAGE_CLASSES[storage](str(tmp_path / f"reference{STORAGE_CLASSES[storage].extension}")).read()
+    np.testing.assert_allclose(after.to_numpy(dtype='float64'), reference.to_numpy(dtype='float64'), equal_nan=True)
+
+    # The hashes of the manifest were updated, refetching again changes nothing.
+    patched = snapshot(path)
+    assert sum(updater.refetch().values()) == 0
+    assert snapshot(path) == patched
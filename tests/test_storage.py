@@ -0,0 +1,64 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from electricity_data_fetching_tr.core.storage import STORAGE_CLASSES
+
+def make_data(first:str, hours:int) -> pd.DataFrame:
+    index = pd.date_range(first, periods=hours, freq='h', name='date')
+    values = np.arange(hours, dtype='float64')
+    return pd.DataFrame({'Price': values * 1.5, 'BalancingMarketPrice': values / 3, 'Hour': index.hour.astype('float64')}, index=index)
+
+def snapshot(directory:str) -> dict:
+    """Get the bytes of every file in a directory, by relative path."""
+    files = {}
+    for root, _, names in os.walk(directory):
+        for name in names:
+            path = os.path.join(root, name)
+            with open(path, 'rb') as f:
+                files[os.path.relpath(path, directory)] = f.read()
+    return files
+
+@pytest.mark.parametrize('storage', sorted(STORAGE_CLASSES))
+@pytest.mark.parametrize('n_rows', [0, 24, 24 * 20])
+@pytest.mark.parametrize('written_hours', [0, 12, 24 * 40])
+def test_interrupted_update_is_recovered(tmp_path, storage, n_rows, written_hours):
+    storage_class = STORAGE_CLASSES[storage]
+    path = str(tmp_path / f"data{storage_class.extension}")
+    # Two months, so the partitioned backends have more than one partition.
+    df = make_data('2024-01-01', 24 * 60)
+    storage_class(path).write(df)
+    before = snapshot(str(tmp_path))
+
+    updating = storage_class(path)
+    updating.begin_update(n_rows)
+    # The update is interrupted after writing some of the new rows.
+    if written_hours:
+        first = df.index[len(df) - n_rows - 1] + pd.Timedelta(hours=1)
+        updating.write(make_data(str(first), written_hours) * 2, append=True)
+
+    # The next process finds the journal and restores the dataset.
+    storage_class(path).recover()
+    assert snapshot(str(tmp_path)) == before
+    assert storage_class(path).read().index.equals(df.index)
+
+@pytest.mark.parametrize('storage', sorted(STORAGE_CLASSES))
+def test_committed_update_keeps_the_new_rows(tmp_path, storage):
+    storage_class = STORAGE_CLASSES[storage]
+    path = str(tmp_path / f"data{storage_class.extension}")
+    df = make_data('2024-01-01', 24 * 60)
+    storage_class(path).write(df.iloc[:24 * 50])
+
+    updating = storage_class(path)
+    last_removed = updating.begin_update(24)
+    assert last_removed == df.index[24 * 50 - 1]
+    updating.write(df.iloc[24 * 49:], append=True)
+    updating.commit()
+
+    # Nothing is left to recover after a commit.
+    storage_class(path).recover()
+    result = storage_class(path).read()
+    assert result.index.equals(df.index)
+    np.testing.assert_allclose(result.to_numpy(dtype='float64'), df.to_numpy())